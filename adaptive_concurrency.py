@@ -0,0 +1,150 @@
+"""
+Latency-driven load control for backend calls
+AdaptiveSemaphore is an AIMD limiter: the limit grows by about one slot per
+round trip while latency stays near its baseline, and is cut multiplicatively
+on overload responses or latency spikes. LatencyTracker and HedgeBudget
+decide when a straggling request earns a duplicate
+"""
+
+import math
+import time
+import asyncio
+import weakref
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+
+class AdaptiveSemaphore:
+    """Semaphore whose limit follows additive-increase / multiplicative-decrease"""
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=16,
+                 latency_tolerance=1.5, latency_decrease=0.8, overload_decrease=0.5):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance  # Latency above baseline x this counts as congestion
+        self.latency_decrease = latency_decrease
+        self.overload_decrease = overload_decrease
+        self.baseline_latency = None
+        self.last_decrease = None  # Monotonic time of the last cut
+        self.in_flight = 0
+        self._waiters = deque()  # Futures of acquire() calls waiting for a slot, FIFO
+
+    async def acquire(self):
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1  # Woken with a slot but cancelled before using it
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def try_acquire(self):
+        """Take a slot only if one is free right now and nobody is queued for it"""
+        if self._waiters or self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """Hand free slots to queued acquire() calls in arrival order"""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1  # The slot is taken on the waiter's behalf
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_success(self, latency):
+        """Grow the limit while latency is flat, shrink it when latency climbs"""
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+
+        if latency <= self.baseline_latency * self.latency_tolerance:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)  # ~ +1 per round trip
+            self._wake()
+        else:
+            self._decrease(self.latency_decrease, f"latency {latency:.1f}s vs baseline {self.baseline_latency:.1f}s")
+
+        # Slow-moving baseline so a single fast response does not make everything look congested
+        self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+
+    def record_overload(self, reason="overload"):
+        """Back off hard on 429/5xx or timeouts"""
+        self._decrease(self.overload_decrease, reason)
+
+    def _decrease(self, factor, reason):
+        """Cut the limit at most once per round trip (one baseline latency), like TCP congestion control"""
+        now = time.monotonic()
+        if (self.last_decrease is not None and self.baseline_latency is not None
+                and now - self.last_decrease < self.baseline_latency):
+            return  # Completions from the same congested round trip
+        self.last_decrease = now
+        
+        previous = int(self.limit)
+        self.limit = max(self.min_limit, self.limit * factor)
+        if int(self.limit) < previous:
+            print(f"🐢 Concurrency {previous} -> {int(self.limit)} ({reason})")
+
+class LatencyTracker:
+    """Sliding window of recent successful latencies"""
+
+    def __init__(self, window=200, min_samples=10):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, p):
+        """Nearest-rank p-th percentile in seconds, or None until min_samples are recorded"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+class HedgeBudget:
+    """Caps how many duplicate requests one unit of work (e.g. a menu) may fire"""
+
+    def __init__(self, max_hedges):
+        self.remaining = max_hedges
+
+    def try_spend(self):
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+# Limiters are bound to the event loop they were created on
+_limiters = weakref.WeakKeyDictionary()  # loop -> {name: AdaptiveSemaphore}
+
+def get_adaptive_semaphore(name, **kwargs):
+    """Shared limiter for a backend on the running loop, so concurrent menus adapt together"""
+    loop = asyncio.get_running_loop()
+    limiters = _limiters.setdefault(loop, {})
+    if name not in limiters:
+        limiters[name] = AdaptiveSemaphore(**kwargs)
+    return limiters[name]
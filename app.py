@@ -1,13 +1,22 @@
 import streamlit as st
-import asyncio
 import os
+import time
+import queue
+import asyncio
 from dotenv import load_dotenv
-from database import init_db, store_menu_upload, store_processed_dishes
-from ocr_service import process_menu_ocr
-from image_generation import generate_dish_images
-from translation_service import translate_dishes
-from utils import parse_menu_structure, categorize_dishes
+from database import init_db, store_menu_upload_async, store_processed_dishes_async, update_processing_status_async
+from ocr_service import stream_menu_ocr, is_fallback_text
+from menu_fingerprint import find_near_duplicate_menu, record_menu_fingerprint
+from pdf_ingestion import is_pdf, stream_pdf_menu
+from image_generation import generate_dish_image, create_hedge_budget, ImageSlotPlanner
+from translation_service import translate_dishes, translate_dishes_multi
 from pixtral_service import select_omakase_dishes, enhance_dish_descriptions
+from pipeline_scheduler import PipelineStage, run_dish_pipeline
+from background_loop import run_coroutine, submit_coroutine
+from image_store import resolve_image
+from menu_result_cache import PIPELINE_VERSION, compute_menu_hash, get_cached_menu, remember_menu
+from lazy_images import lazy_images_enabled, get_visible_image_count, schedule_lazy_images, get_lazy_menu
+from utils import price_to_decimal
 
 load_dotenv()
 
@@ -31,41 +40,421 @@ SUPPORTED_LANGUAGES = {
     "French": "fr"
 }
 
-async def process_menu_pipeline(image_file, target_language):
-    """Main processing pipeline with 15-second constraint"""
-    try:
-        # Phase 1: OCR (3-4 seconds)
-        with st.spinner("Reading menu text..."):
-            menu_text = await process_menu_ocr(image_file)
-        
-        # Phase 2: Parse and categorize (1-2 seconds)
-        with st.spinner("Analyzing menu structure..."):
-            dishes = parse_menu_structure(menu_text)
-            dishes = categorize_dishes(dishes)
+STYLE_PROMPT = "professional food photography, restaurant dish, appetizing, consistent lighting"
+PIPELINE_DEADLINE = 60  # Seconds for the whole pipeline, OCR included
+IMAGE_TIMEOUT = 30  # Seconds of image generation per menu, from the first dish reaching the image stage
+MAX_IMAGES = 20
+
+async def stream_menu_dishes(image_file, upload_id=None, transcript=None):
+    """Yield parsed, categorized dishes as soon as each is known
+
+    If transcript is a dict it receives 'complete' (False when OCR was cut
+    short, a page failed or the placeholder fallback menu was used) and
+    'fallback'.
+    """
+    transcript = transcript if transcript is not None else {}
+    transcript.update(complete=False, fallback=False)
+    image_bytes = image_file.read()
+    image_file.seek(0)
+    
+    if is_pdf(image_bytes):
+        # Pages are OCR'd concurrently and parsed as each completes
+        async for page_index, page_dishes in stream_pdf_menu(image_bytes, transcript=transcript):
+            for dish in page_dishes:
+                dish['page'] = page_index
+                yield dish
+        return
+    
+    # Re-photographed menus reuse prior OCR and parsed dishes
+    near_duplicate = await asyncio.to_thread(find_near_duplicate_menu, image_bytes)
+    if near_duplicate:
+        for dish in near_duplicate['dishes']:
+            yield dish
+        transcript['complete'] = True
+        return
+    
+    # OCR streamed into the parser, dishes emitted line by line
+    dishes = []
+    async for dish in stream_menu_ocr(image_file, transcript):
+        dishes.append(dict(dish))  # Snapshot before later stages mutate it
+        yield dish
+    
+    transcript['fallback'] = is_fallback_text(transcript.get('text'))
+    if transcript.get('complete') and not transcript['fallback']:
+        await asyncio.to_thread(record_menu_fingerprint, upload_id, image_bytes, transcript['text'], dishes)
+
+def build_pipeline_stages(target_language, failures=None, on_update=None):
+    """Per-dish stages: translate -> enhance -> image
+
+    Returns (stages, illustrate_held). Image slots are spread across
+    categories by an ImageSlotPlanner; illustrate_held(deadline) must be
+    awaited once the pipeline has drained to give the slots still free to
+    dishes held back while streaming. Eager images share one IMAGE_TIMEOUT
+    budget from the first dish to reach the image stage, as the phased
+    pipeline did. Names of stages that failed for any dish are added to the
+    `failures` set.
+    """
+    failures = failures if failures is not None else set()
+    lazy = lazy_images_enabled()
+    # With lazy images only the first visible dishes are illustrated before the menu is returned
+    eager_images = min(MAX_IMAGES, get_visible_image_count()) if lazy else MAX_IMAGES
+    hedge_budget = create_hedge_budget(eager_images)
+    planner = ImageSlotPlanner(eager_images)
+    image_deadline = None
+    
+    async def translate_stage(batch):
+        await translate_dishes(batch, target_language)
+        if any([dish.pop('translation_failed', False) for dish in batch]):
+            failures.add("translate")
+    
+    async def enhance_stage(batch):
+        await enhance_dish_descriptions(batch)
+    
+    async def illustrate(dish, deadline, keep_trying=None):
+        dish.pop('image_pending', None)
+        succeeded = False
+        if deadline - time.time() >= 1:
+            succeeded = await generate_dish_image(
+                dish, STYLE_PROMPT, timeout=deadline - time.time(),
+                hedge_budget=hedge_budget, keep_trying=keep_trying
+            )
+        planner.record(dish, succeeded)
+        if not succeeded and lazy:
+            dish['image_pending'] = True  # Another try in the background
+    
+    async def image_stage(batch):
+        nonlocal image_deadline
+        if image_deadline is None:
+            image_deadline = time.time() + IMAGE_TIMEOUT
         
-        # Phase 3: Translation if needed (2-3 seconds)
-        if target_language != "en":
-            with st.spinner("Translating menu..."):
-                dishes = await translate_dishes(dishes, target_language)
+        claimed = []
+        for dish in batch:
+            dish.setdefault('generated_image_url', None)
+            if planner.claim(dish):
+                claimed.append(dish)
+            elif lazy:
+                dish['image_pending'] = True
+        await asyncio.gather(*[illustrate(dish, image_deadline) for dish in claimed])
+    
+    async def illustrate_held(deadline):
+        """Spend the image slots left after streaming on held dishes, spread across categories,
+        and keep retrying failed dishes while the menu is short of MIN_IMAGES"""
+        dishes = planner.release_held() + planner.take_retries()
+        if dishes:
+            deadline = min(deadline, image_deadline)
+            print(f"🎯 {len(dishes)} held or failed dishes to illustrate ({planner.succeeded} images so far)")
+            
+            async def run(dish):
+                await illustrate(dish, deadline, keep_trying=planner.needs_more)
+                if on_update:
+                    on_update(dish, "image")
+            
+            await asyncio.gather(*[run(dish) for dish in dishes])
         
-        # Phase 4: Enhance descriptions for better image generation (1 second)
-        with st.spinner("Enhancing dish descriptions..."):
-            dishes = await enhance_dish_descriptions(dishes)
+        if planner.failed and not lazy:
+            failures.add("image")
+    
+    def tracked(name, handler):
+        async def run(batch):
+            try:
+                await handler(batch)
+            except Exception:
+                failures.add(name)
+                raise
+        return run
+    
+    stages = []
+    if target_language != "en":
+        stages.append(PipelineStage("translate", tracked("translate", translate_stage), concurrency=2, batch_size=8))
+    stages.append(PipelineStage("enhance", tracked("enhance", enhance_stage), concurrency=2, batch_size=10))
+    # One worker per possible eager image, so the FLUX limiter sets the real in-flight count
+    stages.append(PipelineStage("image", tracked("image", image_stage), concurrency=MAX_IMAGES))
+    return stages, illustrate_held
+
+async def process_menu_pipeline(image_file, target_language, upload_id=None, outcome=None, on_update=None):
+    """Main processing pipeline: each dish flows OCR -> translate -> enhance -> image independently
+
+    Menus already processed into target_language are served from the result
+    cache. If `outcome` is a dict it receives 'cached', 'complete' and
+    'images_pending' (dishes left for lazy image generation). A run
+    is only complete if it beat the deadline, OCR read the whole menu (not
+    the fallback placeholder) and no dish failed a stage; only complete runs
+    are cached or stored as 'completed'. `on_update(dish, stage_name)`
+    is forwarded to run_dish_pipeline. Runs on the background event loop, so
+    it must not call Streamlit directly.
+    """
+    outcome = outcome if outcome is not None else {}
+    image_hash = compute_menu_hash(image_file.getvalue())
+    
+    cached_dishes = await asyncio.to_thread(get_cached_menu, image_hash, target_language)
+    if cached_dishes:
+        print(f"⚡ Result cache hit: {len(cached_dishes)} dishes")
+        outcome.update(cached=True, complete=True)
+        return cached_dishes
+    
+    start_time = time.time()
+    transcript = {}
+    failures = set()
+    stages, illustrate_held = build_pipeline_stages(target_language, failures, on_update)
+    dishes = await run_dish_pipeline(
+        stream_menu_dishes(image_file, upload_id, transcript),
+        stages,
+        deadline=PIPELINE_DEADLINE,
+        on_update=on_update
+    )
+    await illustrate_held(start_time + PIPELINE_DEADLINE)
+    
+    # PDF pages finish out of order; keep the printed page order
+    dishes.sort(key=lambda dish: dish.get('page', 0))
+    
+    in_time = time.time() - start_time < PIPELINE_DEADLINE
+    outcome.update(
+        cached=False,
+        complete=in_time and transcript.get('complete', False) and not transcript.get('fallback') and not failures
+    )
+    if lazy_images_enabled():
+        # Dishes the deadline cut off, or whose image failed, get another try in the background
+        for dish in dishes:
+            if not dish.get('generated_image_url'):
+                dish['image_pending'] = True
+    outcome['images_pending'] = any(dish.get('image_pending') for dish in dishes)
+    
+    if not outcome['complete']:
+        print(f"⚠️  Partial run (in time: {in_time}, OCR complete: {transcript.get('complete')}, "
+              f"fallback menu: {transcript.get('fallback')}, failed stages: {sorted(failures)}) - not cached")
+    elif not outcome['images_pending']:
+        remember_menu(image_hash, target_language, dishes)  # Otherwise cached once the lazy images land
+    return dishes
+
+async def process_and_store_menu(image_file, image_name, target_language, outcome=None, on_update=None):
+    """Record the upload, run the pipeline and persist the dishes on the pooled async database layer
+
+    Dishes left without an image are queued for lazy generation once the
+    menu is stored; the returned dishes are filled in as those images land.
+    """
+    image_hash = compute_menu_hash(image_file.getvalue())
+    upload_id = await store_menu_upload_async(image_name, target_language, image_hash, PIPELINE_VERSION)
+    outcome = outcome if outcome is not None else {}
+    try:
+        dishes = await process_menu_pipeline(image_file, target_language, upload_id, outcome, on_update)
+    except Exception:
+        await update_processing_status_async(upload_id, 'failed')
+        raise
+    
+    if not dishes:
+        await update_processing_status_async(upload_id, 'failed')
+    elif outcome.get('cached'):
+        await update_processing_status_async(upload_id, 'cached')  # Dishes already stored under the original upload
+    else:
+        # Only complete runs are eligible as result cache entries; with images still
+        # pending the upload stays 'partial' until the lazy images have all landed
+        completed = outcome.get('complete') and not outcome.get('images_pending')
+        await store_processed_dishes_async(upload_id, dishes, 'completed' if completed else 'partial')
         
-        # Phase 5: Image generation (aggressive retry for minimum 3 images)
-        with st.spinner("Generating dish images..."):
-            dishes = await generate_dish_images(
-                dishes,
-                timeout=30,  # Extended timeout with aggressive retry
-                max_images=20,
-                style_prompt="professional food photography, restaurant dish, appetizing, consistent lighting"
+        if outcome.get('images_pending'):
+            schedule_lazy_images(
+                dishes, upload_id, image_hash if outcome.get('complete') else None, target_language, STYLE_PROMPT
+            )
+    return dishes
+
+async def translate_menu_languages(dishes, languages, image_name=None, image_hash=None, source_language=None):
+    """Translate a processed menu into more languages without re-running OCR or images.
+
+    With an image_hash each fully translated language is also stored as its
+    own completed upload, so the result cache serves it on later uploads of
+    the same menu. Storing waits in the background for the lazy images of
+    the source menu (image_hash, source_language) so no language is cached
+    with dishes still image_pending.
+    """
+    lazy_menu = get_lazy_menu(image_hash, source_language) if image_hash else None
+    translations = await translate_dishes_multi(dishes, languages)
+    
+    complete = {}
+    for language, language_dishes in translations.items():
+        if any([dish.pop('translation_failed', False) for dish in language_dishes]):
+            print(f"⚠️  Some dishes could not be translated into {language} - not stored")
+        else:
+            complete[language] = language_dishes
+    
+    if image_hash and complete:
+        submit_coroutine(store_menu_languages(complete, image_name, image_hash, lazy_menu))
+    return translations
+
+async def store_menu_languages(translations, image_name, image_hash, lazy_menu=None):
+    """Persist and remember translated copies of a menu once the source menu's lazy images have landed"""
+    if lazy_menu is not None:
+        await lazy_menu.settled.wait()
+        if lazy_menu.failed:
+            print(f"⚠️  Lazy images failed for upload {lazy_menu.upload_id} - translations not stored")
+            return
+    
+    for language, language_dishes in translations.items():
+        stored = [dict(dish) for dish in language_dishes]
+        if lazy_menu is not None:
+            # Language copies keep the dish order of the source menu
+            for dish, source_dish in zip(stored, lazy_menu.dishes):
+                dish['generated_image_url'] = source_dish.get('generated_image_url')
+                dish.pop('image_pending', None)
+        if any([dish.pop('image_pending', False) for dish in stored]):
+            print(f"⚠️  {language} menu still has images pending - not stored")
+            continue
+        upload_id = await store_menu_upload_async(image_name, language, image_hash, PIPELINE_VERSION)
+        await store_processed_dishes_async(upload_id, stored)
+        remember_menu(image_hash, language, stored)
+
+def get_prefetch_languages(current_language):
+    """Languages from PREFETCH_LANGUAGES (comma-separated codes) other than the current one"""
+    codes = [code.strip() for code in os.getenv('PREFETCH_LANGUAGES', '').split(',') if code.strip()]
+    return [code for code in codes if code in SUPPORTED_LANGUAGES.values() and code != current_language]
+
+def start_menu_session(dishes, language, image_name, image_hash, complete):
+    """Keep the menu per language in the session and prefetch the configured languages"""
+    st.session_state.processed_dishes = dishes
+    st.session_state.menu_language = language
+    st.session_state.menu_translations = {language: dishes}
+    # Incomplete runs are not persisted as extra languages (they would poison the result cache)
+    st.session_state.menu_source = {
+        'image_name': image_name, 'image_hash': image_hash if complete else None, 'language': language
+    }
+    st.session_state.prefetch_future = None
+    
+    prefetch_languages = get_prefetch_languages(language)
+    if prefetch_languages:
+        st.session_state.prefetch_future = submit_coroutine(
+            translate_menu_languages(
+                dishes, prefetch_languages, image_name, st.session_state.menu_source['image_hash'], language
             )
+        )
+
+def switch_menu_language(language):
+    """Show the menu in another language, translating only if it was not prefetched"""
+    translations = st.session_state.menu_translations
+    
+    future = st.session_state.get('prefetch_future')
+    if future is not None and future.done():
+        try:
+            for code, dishes in future.result().items():
+                translations.setdefault(code, dishes)
+        except Exception as e:
+            print(f"⚠️  Language prefetch failed: {str(e)}")
+        st.session_state.prefetch_future = None
+    
+    if language not in translations:
+        source = st.session_state.menu_source
+        with st.spinner("Translating menu..."):
+            translations.update(run_coroutine(translate_menu_languages(
+                st.session_state.processed_dishes, [language], source['image_name'], source['image_hash'],
+                source['language']
+            )))
+    
+    st.session_state.processed_dishes = translations[language]
+    st.session_state.menu_language = language
+
+# Shown under a dish card while later stages are still working on it
+PROGRESS_LABELS = {
+    "parsed": "⏳ Preparing dish...",
+    "translate": "✍️ Writing description...",
+    "enhance": "🎨 Illustrating..."
+}
+
+def render_dish_card(dish, progress=None):
+    """Image, name and price of a dish; `progress` is a status caption while it is still processing"""
+    if dish.get('generated_image_url'):
+        st.image(resolve_image(dish['generated_image_url']), use_container_width=True)
+    elif progress:
+        st.markdown(f"*{progress}*")
+    elif dish.get('image_pending'):
+        st.markdown("🎨 *Image on its way...*")
+    else:
+        st.markdown("🍽️ *Upgrade to see the full visual menu*")
+    
+    # Dish name and price
+    st.markdown(f"**{dish.get('name_translated', dish.get('name_original', 'Unknown'))}**")
+    if dish.get('price'):
+        st.markdown(f"💰 {dish['price']}")
+
+class ProgressiveMenuView:
+    """Dish grid drawn from pipeline updates: each card is an st.empty() slot
+    redrawn in place as translation, enhancement and its image complete"""
+    
+    def __init__(self, final_stage):
+        self.final_stage = final_stage
+        self.updates = queue.Queue()  # (dish key, dish snapshot, stage name) from the background loop
+        self.status = st.empty()
+        self.categories = {}  # category -> (columns, card count)
+        self.slots = {}
+        self.finished = set()  # Keys of cards past the final stage; held dishes may pass it twice
+    
+    def on_update(self, dish, stage_name):
+        """Pipeline callback; runs on the background loop, so it only snapshots and enqueues"""
+        self.updates.put((id(dish), dict(dish), stage_name))
+    
+    def slot_for(self, key, dish):
+        if key not in self.slots:
+            category = dish.get('category', 'Other')
+            if category not in self.categories:
+                st.subheader(category.title())
+                self.categories[category] = (st.columns(3), 0)
+            cols, count = self.categories[category]
+            self.categories[category] = (cols, count + 1)
+            with cols[count % 3]:
+                self.slots[key] = st.empty()
+        return self.slots[key]
+    
+    def drain(self, timeout=0.1):
+        """Redraw every card with a pending update, waiting up to timeout for the first"""
+        try:
+            update = self.updates.get(timeout=timeout)
+        except queue.Empty:
+            return
+        
+        while update is not None:
+            key, dish, stage_name = update
+            done = stage_name == self.final_stage
+            if done:
+                self.finished.add(key)
+            with self.slot_for(key, dish).container():
+                render_dish_card(dish, None if done else PROGRESS_LABELS.get(stage_name, "⏳ Working..."))
+            try:
+                update = self.updates.get_nowait()
+            except queue.Empty:
+                update = None
         
-        return dishes
+        self.status.caption(f"✨ {len(self.finished)}/{len(self.slots)} dishes ready")
+    
+    def run(self, future):
+        """Render updates until the pipeline future completes, then return its result"""
+        while not future.done():
+            self.drain()
+        self.drain(timeout=0)
+        return future.result()
+
+def process_menu_progressively(uploaded_file, target_language, outcome):
+    """Run the pipeline in the background and draw dish cards as soon as they are parsed"""
+    view = ProgressiveMenuView(final_stage="image")
+    with st.spinner("Reading your menu..."):
+        future = submit_coroutine(
+            process_and_store_menu(uploaded_file, uploaded_file.name, target_language, outcome, view.on_update)
+        )
+        # The spinner covers OCR only; once dishes stream in the grid shows progress
+        while not future.done() and view.updates.empty():
+            time.sleep(0.05)
+    return view.run(future)
+
+def sync_lazy_images():
+    """Lazy images land on the dishes the pipeline returned; copy them onto the language being shown"""
+    source = st.session_state.get('menu_source') or {}
+    source_dishes = st.session_state.get('menu_translations', {}).get(source.get('language'))
+    dishes = st.session_state.processed_dishes
+    if not source_dishes or source_dishes is dishes:
+        return
     
-    except Exception as e:
-        st.error(f"Processing failed: {str(e)}")
-        return None
+    # Language copies keep the dish order of the source menu
+    for dish, source_dish in zip(dishes, source_dishes):
+        if dish.get('image_pending'):
+            dish['generated_image_url'] = source_dish.get('generated_image_url')
+            if not source_dish.get('image_pending'):
+                dish.pop('image_pending', None)
 
 def display_menu_grid(dishes):
     """Display dishes in responsive grid layout"""
@@ -94,17 +483,7 @@ def display_menu_grid(dishes):
         for idx, dish in enumerate(category_dishes):
             with cols[idx % 3]:
                 with st.container():
-                    # Display image or placeholder
-                    if dish.get('generated_image_url'):
-                        st.image(dish['generated_image_url'], use_container_width=True)
-                    else:
-                        st.empty()
-                        st.markdown("🍽️ *Upgrade to see the full visual menu*")
-                    
-                    # Dish name and price
-                    st.markdown(f"**{dish.get('name_translated', dish.get('name_original', 'Unknown'))}**")
-                    if dish.get('price'):
-                        st.markdown(f"💰 {dish['price']}")
+                    render_dish_card(dish)
                     
                     # Click for details - use unique dish ID
                     if st.button(f"View Details", key=f"detail_{dish['id']}"):
@@ -117,7 +496,7 @@ def show_dish_modal(dish):
         
         with col1:
             if dish.get('generated_image_url'):
-                st.image(dish['generated_image_url'], use_container_width=True)
+                st.image(resolve_image(dish['generated_image_url']), use_container_width=True)
             else:
                 st.markdown("🍽️ *Upgrade to see the full visual menu*")
         
@@ -149,8 +528,8 @@ def main():
         
         # File uploader
         uploaded_file = st.file_uploader(
-            "Choose a menu image",
-            type=['jpg', 'jpeg', 'png'],
+            "Choose a menu image or PDF",
+            type=['jpg', 'jpeg', 'png', 'pdf'],
             help="Maximum file size: 10MB"
         )
         
@@ -167,29 +546,27 @@ def main():
                 st.error("File too large. Maximum size is 10MB.")
                 return
             
-            # Store upload in database
-            upload_id = store_menu_upload(
-                uploaded_file.name,
-                SUPPORTED_LANGUAGES[selected_language]
-            )
-            
-            # Process the menu
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
+            # Process and store the menu on the shared background event loop
+            target_language = SUPPORTED_LANGUAGES[selected_language]
+            outcome = {}
             try:
-                dishes = loop.run_until_complete(
-                    process_menu_pipeline(uploaded_file, SUPPORTED_LANGUAGES[selected_language])
+                if os.getenv('PROGRESSIVE_RENDERING', 'true').lower() == 'true':
+                    dishes = process_menu_progressively(uploaded_file, target_language, outcome)
+                else:
+                    with st.spinner("Reading, translating and illustrating your menu..."):
+                        dishes = run_coroutine(
+                            process_and_store_menu(uploaded_file, uploaded_file.name, target_language, outcome)
+                        )
+            except Exception as e:
+                st.error(f"Processing failed: {str(e)}")
+                dishes = None
+            
+            if dishes:
+                start_menu_session(
+                    dishes, target_language, uploaded_file.name,
+                    compute_menu_hash(uploaded_file.getvalue()), outcome.get('complete', False)
                 )
-                
-                if dishes:
-                    # Store processed dishes
-                    store_processed_dishes(upload_id, dishes)
-                    st.session_state.processed_dishes = dishes
-                    st.rerun()
-                
-            finally:
-                loop.close()
+                st.rerun()
     
     else:
         # Display processed menu
@@ -203,17 +580,37 @@ def main():
         with col2:
             st.markdown("### Your Visual Menu")
         
+        # Language switcher: prefetched or previously viewed languages switch instantly
+        language_names = list(SUPPORTED_LANGUAGES.keys())
+        language_codes = list(SUPPORTED_LANGUAGES.values())
+        current_language = st.session_state.get('menu_language', 'en')
+        menu_language = st.selectbox(
+            "Menu language",
+            options=language_names,
+            index=language_codes.index(current_language) if current_language in language_codes else 0
+        )
+        if SUPPORTED_LANGUAGES[menu_language] != current_language and 'menu_translations' in st.session_state:
+            try:
+                switch_menu_language(SUPPORTED_LANGUAGES[menu_language])
+                st.rerun()
+            except Exception as e:
+                st.error(f"Translation failed: {str(e)}")
+        
+        # Lazy images land in the session's dishes in the background; a rerun shows them
+        sync_lazy_images()
+        pending_images = sum(1 for dish in st.session_state.processed_dishes if dish.get('image_pending'))
+        if pending_images:
+            st.caption(f"🎨 {pending_images} more dish images on the way")
+            st.button("🔄 Show new images")  # Any click reruns the script, which picks them up
+        
         # Display dishes
         display_menu_grid(st.session_state.processed_dishes)
         
         # Omakase button (floating action)
         if st.button("🎲 Omakase! (Chef's Choice)", type="secondary"):
             with st.spinner("Chef is selecting the perfect combination..."):
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
                 try:
-                    omakase_dishes = loop.run_until_complete(
+                    omakase_dishes = run_coroutine(
                         select_omakase_dishes(st.session_state.processed_dishes)
                     )
                     
@@ -227,7 +624,7 @@ def main():
                                 
                                 with col1:
                                     if dish.get('generated_image_url'):
-                                        st.image(dish['generated_image_url'], use_container_width=True)
+                                        st.image(resolve_image(dish['generated_image_url']), use_container_width=True)
                                     else:
                                         st.markdown("🍽️ *Upgrade to see the full visual menu*")
                                 
@@ -246,26 +643,23 @@ def main():
                                 
                                 st.divider()
                         
-                        # Calculate total price
+                        # Calculate total price (only when every priced dish uses the same currency)
                         total_price = 0
+                        currencies = set()
                         for dish in omakase_dishes:
-                            price_str = dish.get('price', '').replace('$', '').replace(',', '')
-                            try:
-                                price = float(price_str)
+                            price = price_to_decimal(dish.get('price'))
+                            if price is not None:
                                 total_price += price
-                            except (ValueError, AttributeError):
-                                pass
+                                currencies.add(dish['price'][:1] if not dish['price'][:1].isdigit() else '')
                         
-                        if total_price > 0:
-                            st.markdown(f"### Total: ${total_price:.2f}")
+                        if total_price > 0 and len(currencies) == 1:
+                            st.markdown(f"### Total: {currencies.pop()}{total_price:.2f}")
                     
                     else:
                         st.error("Unable to create Omakase selection")
                         
                 except Exception as e:
                     st.error(f"Omakase selection failed: {str(e)}")
-                finally:
-                    loop.close()
 
 if __name__ == "__main__":
     # Initialize database on startup
@@ -3,13 +3,20 @@ Simplified main application using consolidated services
 Reduces app.py complexity while maintaining all features
 """
 
-import streamlit as st
+import os
+import time
 import asyncio
-from database import init_db, store_menu_upload, store_processed_dishes
-from ocr_service_simplified import process_menu_ocr
-from image_generation_simplified import generate_dish_images
+import streamlit as st
+from database import init_db, store_menu_upload_async, store_processed_dishes_async, update_processing_status_async
+from ocr_service_simplified import process_menu_ocr, is_fallback_text
+from menu_fingerprint import find_near_duplicate_menu, record_menu_fingerprint
+from image_generation_simplified import generate_single_image
 from menu_intelligence import translate_dishes, enhance_descriptions, select_omakase_dishes
 from utils import parse_menu_structure, categorize_dishes
+from pipeline_scheduler import PipelineStage, run_dish_pipeline
+from background_loop import run_coroutine
+from image_store import resolve_image
+from menu_result_cache import PIPELINE_VERSION, compute_menu_hash, get_cached_menu, remember_menu
 
 st.set_page_config(
     page_title="Snapmenu",
@@ -26,34 +33,128 @@ SUPPORTED_LANGUAGES = {
 class MenuProcessor:
     """Simplified menu processing pipeline"""
     
+    DEADLINE = 60
+    MAX_IMAGES = 20
+    
     @staticmethod
-    async def process_complete_menu(image_file, target_language):
-        """Process menu through entire pipeline"""
-        try:
-            # Phase 1: OCR
-            with st.spinner("Reading menu..."):
-                menu_text = await process_menu_ocr(image_file)
-            
-            # Phase 2: Parse and categorize
-            with st.spinner("Analyzing menu structure..."):
-                dishes = parse_menu_structure(menu_text)
-                dishes = categorize_dishes(dishes)
-            
-            # Phase 3: Translation
-            if target_language != "en":
-                with st.spinner("Translating menu..."):
-                    dishes = await translate_dishes(dishes, target_language)
-            
-            # Phase 4: Enhancement and image generation
-            with st.spinner("Generating dish images..."):
-                dishes = await enhance_descriptions(dishes)
-                dishes = await generate_dish_images(dishes)
-            
-            return dishes
+    async def stream_dishes(image_file, upload_id=None, transcript=None):
+        """Yield parsed dishes from a near-duplicate match or fresh OCR
+
+        If transcript is a dict it receives 'complete', False when OCR fell
+        back to the placeholder menu.
+        """
+        transcript = transcript if transcript is not None else {}
+        transcript['complete'] = False
+        image_bytes = image_file.read()
+        image_file.seek(0)
+        
+        # Re-photographed menus reuse prior OCR and parsed dishes
+        near_duplicate = await asyncio.to_thread(find_near_duplicate_menu, image_bytes)
+        
+        if near_duplicate:
+            dishes = near_duplicate['dishes']
+            transcript['complete'] = True
+        else:
+            menu_text = await process_menu_ocr(image_file)
+            dishes = categorize_dishes(parse_menu_structure(menu_text))
             
-        except Exception as e:
-            st.error(f"Processing failed: {str(e)}")
-            return None
+            if not is_fallback_text(menu_text):
+                transcript['complete'] = True
+                await asyncio.to_thread(record_menu_fingerprint, upload_id, image_bytes, menu_text, dishes)
+        
+        for dish in dishes:
+            yield dish
+    
+    @staticmethod
+    def build_stages(target_language, failures=None):
+        """Per-dish stages: translate -> enhance -> image; failed stage names are added to `failures`"""
+        failures = failures if failures is not None else set()
+        image_count = 0
+        
+        async def translate_stage(batch):
+            await translate_dishes(batch, target_language)
+            if any([dish.pop('translation_failed', False) for dish in batch]):
+                failures.add("translate")
+        
+        async def image_stage(batch):
+            nonlocal image_count
+            for dish in batch:
+                dish.setdefault('generated_image_url', None)
+                if image_count >= MenuProcessor.MAX_IMAGES:
+                    continue
+                image_count += 1
+                dish['generated_image_url'] = await generate_single_image(
+                    dish.get('name_translated') or dish.get('name_original', '')
+                )
+                if not dish['generated_image_url'] and os.getenv('FLUX_ENDPOINT') and os.getenv('KOYEB_API_KEY'):
+                    failures.add("image")
+        
+        def tracked(name, handler):
+            async def run(batch):
+                try:
+                    await handler(batch)
+                except Exception:
+                    failures.add(name)
+                    raise
+            return run
+        
+        stages = []
+        if target_language != "en":
+            stages.append(PipelineStage("translate", tracked("translate", translate_stage), concurrency=2, batch_size=8))
+        stages.append(PipelineStage("enhance", tracked("enhance", enhance_descriptions), batch_size=8))
+        stages.append(PipelineStage("image", tracked("image", image_stage), concurrency=3))
+        return stages
+    
+    @staticmethod
+    async def process_complete_menu(image_file, target_language, upload_id=None, outcome=None):
+        """Process menu through entire pipeline, each dish flowing through stages independently.
+
+        Known menus come straight from the result cache; `outcome` receives 'cached' and 'complete'.
+        Only runs that beat the deadline with real OCR text and no failed stage are complete.
+        """
+        outcome = outcome if outcome is not None else {}
+        image_hash = compute_menu_hash(image_file.getvalue())
+        
+        cached_dishes = await asyncio.to_thread(get_cached_menu, image_hash, target_language)
+        if cached_dishes:
+            outcome.update(cached=True, complete=True)
+            return cached_dishes
+        
+        start_time = time.time()
+        transcript = {}
+        failures = set()
+        dishes = await run_dish_pipeline(
+            MenuProcessor.stream_dishes(image_file, upload_id, transcript),
+            MenuProcessor.build_stages(target_language, failures),
+            deadline=MenuProcessor.DEADLINE
+        )
+        
+        in_time = time.time() - start_time < MenuProcessor.DEADLINE
+        outcome.update(cached=False, complete=in_time and transcript.get('complete', False) and not failures)
+        if outcome['complete']:
+            remember_menu(image_hash, target_language, dishes)
+        return dishes
+    
+    @staticmethod
+    async def process_and_store_menu(image_file, image_name, target_language):
+        """Record the upload, process the menu and persist the dishes through the async pool"""
+        upload_id = await store_menu_upload_async(
+            image_name, target_language, compute_menu_hash(image_file.getvalue()), PIPELINE_VERSION
+        )
+        outcome = {}
+        try:
+            dishes = await MenuProcessor.process_complete_menu(image_file, target_language, upload_id, outcome)
+        except Exception:
+            await update_processing_status_async(upload_id, 'failed')
+            raise
+        
+        if not dishes:
+            await update_processing_status_async(upload_id, 'failed')
+        elif outcome.get('cached'):
+            await update_processing_status_async(upload_id, 'cached')
+        else:
+            await store_processed_dishes_async(upload_id, dishes, 'completed' if outcome.get('complete') else 'partial')
+        return dishes
 
 def display_menu_grid(dishes):
     """Simplified menu display"""
@@ -81,7 +182,7 @@ def display_menu_grid(dishes):
         for idx, dish in enumerate(category_dishes):
             with cols[idx % 3]:
                 if dish.get('generated_image_url'):
-                    st.image(dish['generated_image_url'], use_container_width=True)
+                    st.image(resolve_image(dish['generated_image_url']), use_container_width=True)
                 else:
                     st.markdown("🍽️ *Upgrade to see the full visual menu*")
                 
@@ -99,7 +200,7 @@ def show_dish_details(dish):
         
         with col1:
             if dish.get('generated_image_url'):
-                st.image(dish['generated_image_url'], use_container_width=True)
+                st.image(resolve_image(dish['generated_image_url']), use_container_width=True)
             else:
                 st.markdown("🍽️ *Upgrade to see the full visual menu*")
         
@@ -142,25 +243,19 @@ def main():
                 st.error("File too large. Maximum size is 10MB.")
                 return
             
-            # Store upload
-            upload_id = store_menu_upload(uploaded_file.name, SUPPORTED_LANGUAGES[selected_language])
-            
-            # Process menu
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
+            # Process and store menu on the shared background event loop
             try:
-                dishes = loop.run_until_complete(
-                    MenuProcessor.process_complete_menu(uploaded_file, SUPPORTED_LANGUAGES[selected_language])
-                )
-                
-                if dishes:
-                    store_processed_dishes(upload_id, dishes)
-                    st.session_state.processed_dishes = dishes
-                    st.rerun()
-                    
-            finally:
-                loop.close()
+                with st.spinner("Reading, translating and illustrating your menu..."):
+                    dishes = run_coroutine(
+                        MenuProcessor.process_and_store_menu(uploaded_file, uploaded_file.name, SUPPORTED_LANGUAGES[selected_language])
+                    )
+            except Exception as e:
+                st.error(f"Processing failed: {str(e)}")
+                dishes = None
+            
+            if dishes:
+                st.session_state.processed_dishes = dishes
+                st.rerun()
     
     else:
         # Display processed menu
@@ -179,39 +274,32 @@ def main():
         # Omakase feature
         if st.button("🎲 Omakase! (Chef's Choice)", type="secondary"):
             with st.spinner("Selecting the perfect combination..."):
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+                omakase = run_coroutine(
+                    select_omakase_dishes(st.session_state.processed_dishes)
+                )
                 
-                try:
-                    omakase = loop.run_until_complete(
-                        select_omakase_dishes(st.session_state.processed_dishes)
-                    )
-                    
-                    if omakase:
-                        st.success("🍽️ Chef's Omakase Selection")
-                        for i, dish in enumerate(omakase):
-                            course_names = ["Appetizer", "Main Course", "Dessert"]
-                            course = course_names[i] if i < len(course_names) else "Course"
-                            
-                            col1, col2 = st.columns([1, 2])
-                            with col1:
-                                if dish.get('generated_image_url'):
-                                    st.image(dish['generated_image_url'], use_container_width=True)
-                                else:
-                                    st.markdown("🍽️ *Upgrade to see the full visual menu*")
-                            
-                            with col2:
-                                st.markdown(f"**{course}**")
-                                st.markdown(f"### {dish.get('name_translated', 'Unknown')}")
-                                if dish.get('description_translated'):
-                                    st.markdown(dish['description_translated'])
-                                if dish.get('price'):
-                                    st.markdown(f"**{dish['price']}**")
-                            
-                            st.divider()
-                            
-                finally:
-                    loop.close()
+                if omakase:
+                    st.success("🍽️ Chef's Omakase Selection")
+                    for i, dish in enumerate(omakase):
+                        course_names = ["Appetizer", "Main Course", "Dessert"]
+                        course = course_names[i] if i < len(course_names) else "Course"
+                        
+                        col1, col2 = st.columns([1, 2])
+                        with col1:
+                            if dish.get('generated_image_url'):
+                                st.image(resolve_image(dish['generated_image_url']), use_container_width=True)
+                            else:
+                                st.markdown("🍽️ *Upgrade to see the full visual menu*")
+                        
+                        with col2:
+                            st.markdown(f"**{course}**")
+                            st.markdown(f"### {dish.get('name_translated', 'Unknown')}")
+                            if dish.get('description_translated'):
+                                st.markdown(dish['description_translated'])
+                            if dish.get('price'):
+                                st.markdown(f"**{dish['price']}**")
+                        
+                        st.divider()
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,68 @@
+"""
+Persistent background asyncio event loop owned by the process
+Streamlit actions submit coroutines here instead of creating and closing a
+new event loop per click, so pooled connections and background work survive
+"""
+
+import asyncio
+import atexit
+import threading
+import concurrent.futures
+from http_pool import close_pools
+
+class BackgroundLoop:
+    """An event loop running forever on a daemon thread"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="snapmenu-event-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine and return a concurrent.futures.Future for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _close_pools(self):
+        from database import close_async_db_pool
+        await close_async_db_pool()
+        await close_pools()
+
+    def stop(self, timeout=5.0):
+        """Close pooled connections, then stop the loop"""
+        if not self.loop.is_running():
+            return
+        try:
+            self.submit(self._close_pools()).result(timeout)
+        except Exception as e:
+            print(f"⚠️  Failed to close connection pools: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+# Global loop instance, shared by every Streamlit session in the process
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+def get_background_loop():
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+            atexit.register(_background_loop.stop)
+    return _background_loop
+
+def submit_coroutine(coro):
+    """Fire-and-forget or pollable submission to the background loop"""
+    return get_background_loop().submit(coro)
+
+def run_coroutine(coro, timeout=None):
+    """Run a coroutine on the background loop and block the calling thread for its result"""
+    future = submit_coroutine(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
@@ -1,21 +1,124 @@
 import os
+import time
+import asyncio
+import weakref
+import threading
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, Json, execute_values
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import ThreadedConnectionPool
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import datetime
+from utils import price_to_decimal
+
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 10
+POOL_CHECKOUT_TIMEOUT = 10  # Seconds to wait for a free connection
+HEALTH_CHECK_IDLE_SECONDS = 30  # Ping connections idle longer than this before reuse
+ASYNC_POOL_RETRY_COOLDOWN = 30  # Seconds on the psycopg2 fallback before retrying a failed asyncpg pool
+
+PROCESSED_DISH_COLUMNS = [
+    'menu_upload_id', 'dish_name_original', 'dish_name_translated',
+    'description_original', 'description_translated', 'price',
+    'category', 'generated_image_url', 'display_order',
+    'price_display', 'enhanced_description'
+]
+
+def report_error(message):
+    """st.error on the Streamlit script thread; the background loop and its worker threads only log"""
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        st.error(message)
+    else:
+        print(f"❌ {message}")
+
+def get_pool_sizes():
+    min_size = int(os.getenv('DB_POOL_MIN_SIZE', DEFAULT_POOL_MIN_SIZE))
+    max_size = int(os.getenv('DB_POOL_MAX_SIZE', DEFAULT_POOL_MAX_SIZE))
+    return min_size, max(min_size, max_size)
+
+class DatabasePool:
+    """psycopg2 ThreadedConnectionPool that blocks when exhausted and
+    health-checks connections that sat idle before handing them out"""
+
+    def __init__(self, dsn):
+        min_size, max_size = get_pool_sizes()
+        self._pool = ThreadedConnectionPool(min_size, max_size, dsn, cursor_factory=RealDictCursor)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}  # id(conn) -> time returned to the pool
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.time() - self._last_used.get(id(conn), 0) < HEALTH_CHECK_IDLE_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=POOL_CHECKOUT_TIMEOUT):
+            raise TimeoutError(f"No database connection free after {POOL_CHECKOUT_TIMEOUT}s")
+        try:
+            for _ in range(3):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+            raise psycopg2.OperationalError("Database connections keep failing health checks")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                return
+            if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()  # Never hand out a connection mid-transaction
+            self._last_used[id(conn)] = time.time()
+            self._pool.putconn(conn)
+        except Exception as e:
+            print(f"⚠️  Discarding database connection: {str(e)}")
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+# Global pool instance
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is None:
+            _db_pool = DatabasePool(os.getenv('DATABASE_URL'))
+    return _db_pool
 
 def get_db_connection():
-    """Get database connection using Neon PostgreSQL"""
+    """Check out a pooled Neon PostgreSQL connection; return it with release_db_connection"""
     try:
-        conn = psycopg2.connect(
-            os.getenv('DATABASE_URL'),
-            cursor_factory=RealDictCursor
-        )
-        return conn
+        return get_db_pool().getconn()
     except Exception as e:
-        st.error(f"Database connection failed: {str(e)}")
+        report_error(f"Database connection failed: {str(e)}")
         return None
 
+def release_db_connection(conn):
+    """Return a connection to the pool (replaces conn.close())"""
+    get_db_pool().putconn(conn)
+
 def init_db():
     """Initialize database tables"""
     conn = get_db_connection()
@@ -51,16 +154,99 @@ def init_db():
                 )
             """)
             
+            # Result cache columns: whole processed menus keyed by image hash, language and pipeline version
+            cur.execute("""
+                ALTER TABLE menu_uploads
+                ADD COLUMN IF NOT EXISTS image_hash CHAR(64),
+                ADD COLUMN IF NOT EXISTS pipeline_version VARCHAR(20)
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_menu_uploads_result_cache
+                ON menu_uploads (image_hash, selected_language, pipeline_version)
+                WHERE processing_status = 'completed'
+            """)
+            cur.execute("""
+                ALTER TABLE processed_dishes
+                ADD COLUMN IF NOT EXISTS price_display TEXT,
+                ADD COLUMN IF NOT EXISTS enhanced_description TEXT
+            """)
+            # Menus are read by upload and lazy images update single dishes by display order
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_processed_dishes_upload
+                ON processed_dishes (menu_upload_id, display_order)
+            """)
+            
+            # Create menu_fingerprints table (perceptual hashes of uploaded menus)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS menu_fingerprints (
+                    id SERIAL PRIMARY KEY,
+                    menu_upload_id INTEGER REFERENCES menu_uploads(id),
+                    dhash BIGINT NOT NULL,
+                    ocr_text TEXT,
+                    dishes JSONB,
+                    created_at TIMESTAMP DEFAULT NOW()
+                )
+            """)
+            
+            # Create dish_image_cache table (dish key -> image store reference or remote URL)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS dish_image_cache (
+                    cache_key CHAR(64) PRIMARY KEY,
+                    dish_name_normalized TEXT NOT NULL,
+                    style_prompt TEXT,
+                    resolution VARCHAR(20),
+                    image_url TEXT,
+                    hit_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT NOW()
+                )
+            """)
+            
+            # Create image_blobs table (content-addressed WebP images)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS image_blobs (
+                    content_hash CHAR(64) PRIMARY KEY,
+                    mime_type VARCHAR(50) NOT NULL,
+                    data BYTEA NOT NULL,
+                    created_at TIMESTAMP DEFAULT NOW()
+                )
+            """)
+            
+            # Create translation_memory table (normalised source string + language -> translation)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS translation_memory (
+                    source_hash CHAR(64) NOT NULL,
+                    target_language VARCHAR(10) NOT NULL,
+                    source_text TEXT NOT NULL,
+                    translated_text TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (source_hash, target_language)
+                )
+            """)
+            
+            # Create ocr_cache table (content-addressed OCR results)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_cache (
+                    cache_key CHAR(64) PRIMARY KEY,
+                    ocr_text TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT NOW(),
+                    last_accessed TIMESTAMP DEFAULT NOW()
+                )
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_accessed
+                ON ocr_cache (last_accessed)
+            """)
+            
             conn.commit()
             return True
             
     except Exception as e:
-        st.error(f"Database initialization failed: {str(e)}")
+        report_error(f"Database initialization failed: {str(e)}")
         return False
     finally:
-        conn.close()
+        release_db_connection(conn)
 
-def store_menu_upload(image_name, selected_language):
+def store_menu_upload(image_name, selected_language, image_hash=None, pipeline_version=None):
     """Store menu upload record and return upload_id"""
     conn = get_db_connection()
     if not conn:
@@ -69,56 +255,75 @@ def store_menu_upload(image_name, selected_language):
     try:
         with conn.cursor() as cur:
             cur.execute("""
-                INSERT INTO menu_uploads (original_image_url, selected_language)
-                VALUES (%s, %s)
+                INSERT INTO menu_uploads (original_image_url, selected_language, image_hash, pipeline_version)
+                VALUES (%s, %s, %s, %s)
                 RETURNING id
-            """, (image_name, selected_language))
+            """, (image_name, selected_language, image_hash, pipeline_version))
             
             upload_id = cur.fetchone()['id']
             conn.commit()
             return upload_id
             
     except Exception as e:
-        st.error(f"Failed to store upload: {str(e)}")
+        report_error(f"Failed to store upload: {str(e)}")
         return None
     finally:
-        conn.close()
+        release_db_connection(conn)
+
+def processed_dish_rows(upload_id, dishes):
+    """Rows for processed_dishes in PROCESSED_DISH_COLUMNS order, with display order preserved"""
+    return [
+        (
+            upload_id,
+            dish.get('name_original'),
+            dish.get('name_translated'),
+            dish.get('description_original'),
+            dish.get('description_translated'),
+            price_to_decimal(dish.get('price')),
+            dish.get('category'),
+            dish.get('generated_image_url'),
+            idx,
+            dish.get('price'),
+            dish.get('enhanced_description')
+        )
+        for idx, dish in enumerate(dishes)
+    ]
+
+def insert_processed_dishes(cur, upload_id, dishes):
+    """Insert all dishes of a menu in a single multi-row INSERT round trip"""
+    execute_values(
+        cur,
+        f"INSERT INTO processed_dishes ({', '.join(PROCESSED_DISH_COLUMNS)}) VALUES %s",
+        processed_dish_rows(upload_id, dishes),
+        page_size=max(len(dishes), 1)
+    )
 
-def store_processed_dishes(upload_id, dishes):
-    """Store processed dishes in database"""
+def store_processed_dishes(upload_id, dishes, status='completed'):
+    """Store processed dishes and mark the upload with status in one transaction"""
     conn = get_db_connection()
     if not conn:
         return False
     
     try:
         with conn.cursor() as cur:
-            for idx, dish in enumerate(dishes):
+            if dishes:
+                insert_processed_dishes(cur, upload_id, dishes)
+            if status:
                 cur.execute("""
-                    INSERT INTO processed_dishes (
-                        menu_upload_id, dish_name_original, dish_name_translated,
-                        description_original, description_translated, price,
-                        category, generated_image_url, display_order
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    upload_id,
-                    dish.get('name_original'),
-                    dish.get('name_translated'),
-                    dish.get('description_original'),
-                    dish.get('description_translated'),
-                    dish.get('price'),
-                    dish.get('category'),
-                    dish.get('generated_image_url'),
-                    idx
-                ))
+                    UPDATE menu_uploads 
+                    SET processing_status = %s 
+                    WHERE id = %s
+                """, (status, upload_id))
             
             conn.commit()
             return True
             
     except Exception as e:
-        st.error(f"Failed to store dishes: {str(e)}")
+        conn.rollback()
+        report_error(f"Failed to store dishes: {str(e)}")
         return False
     finally:
-        conn.close()
+        release_db_connection(conn)
 
 def update_processing_status(upload_id, status):
     """Update processing status for upload"""
@@ -138,7 +343,480 @@ def update_processing_status(upload_id, status):
             return True
             
     except Exception as e:
-        st.error(f"Failed to update status: {str(e)}")
+        report_error(f"Failed to update status: {str(e)}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def update_dish_image(upload_id, display_order, image_url):
+    """Attach a lazily generated image to an already stored dish"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE processed_dishes 
+                SET generated_image_url = %s 
+                WHERE menu_upload_id = %s AND display_order = %s
+            """, (image_url, upload_id, display_order))
+            
+            conn.commit()
+            return True
+            
+    except Exception as e:
+        report_error(f"Failed to store dish image: {str(e)}")
         return False
     finally:
-        conn.close()
\ No newline at end of file
+        release_db_connection(conn)
+
+def get_processed_menu(image_hash, selected_language, pipeline_version):
+    """Return the dishes of the latest completed upload of this menu image, or None"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT d.dish_name_original, d.dish_name_translated,
+                       d.description_original, d.description_translated,
+                       d.price_display, d.category, d.generated_image_url,
+                       d.enhanced_description
+                FROM processed_dishes d
+                WHERE d.menu_upload_id = (
+                    SELECT id FROM menu_uploads
+                    WHERE image_hash = %s AND selected_language = %s
+                      AND pipeline_version = %s AND processing_status = 'completed'
+                    ORDER BY id DESC
+                    LIMIT 1
+                )
+                ORDER BY d.display_order
+            """, (image_hash, selected_language, pipeline_version))
+            
+            rows = cur.fetchall()
+            if not rows:
+                return None
+            
+            return [
+                {
+                    'name_original': row['dish_name_original'],
+                    'name_translated': row['dish_name_translated'],
+                    'description_original': row['description_original'],
+                    'description_translated': row['description_translated'],
+                    'price': row['price_display'],
+                    'category': row['category'],
+                    'generated_image_url': row['generated_image_url'],
+                    'enhanced_description': row['enhanced_description']
+                }
+                for row in rows
+            ]
+            
+    except Exception as e:
+        report_error(f"Failed to load processed menu: {str(e)}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def get_cached_ocr_result(cache_key, ttl_seconds):
+    """Return cached OCR text if present and not expired, refreshing its LRU timestamp"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE ocr_cache 
+                SET last_accessed = NOW() 
+                WHERE cache_key = %s 
+                  AND created_at > NOW() - make_interval(secs => %s)
+                RETURNING ocr_text
+            """, (cache_key, ttl_seconds))
+            
+            row = cur.fetchone()
+            conn.commit()
+            return row['ocr_text'] if row else None
+            
+    except Exception as e:
+        report_error(f"Failed to read OCR cache: {str(e)}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def store_ocr_result(cache_key, ocr_text, ttl_seconds, max_entries):
+    """Store OCR text and evict expired and least recently used entries"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO ocr_cache (cache_key, ocr_text)
+                VALUES (%s, %s)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    ocr_text = EXCLUDED.ocr_text,
+                    created_at = NOW(),
+                    last_accessed = NOW()
+            """, (cache_key, ocr_text))
+            
+            cur.execute("""
+                DELETE FROM ocr_cache 
+                WHERE created_at < NOW() - make_interval(secs => %s)
+            """, (ttl_seconds,))
+            
+            cur.execute("""
+                DELETE FROM ocr_cache WHERE cache_key IN (
+                    SELECT cache_key FROM ocr_cache 
+                    ORDER BY last_accessed DESC 
+                    OFFSET %s
+                )
+            """, (max_entries,))
+            
+            conn.commit()
+            return True
+            
+    except Exception as e:
+        report_error(f"Failed to store OCR cache: {str(e)}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def store_menu_fingerprint(upload_id, dhash, ocr_text, dishes):
+    """Store perceptual hash with the OCR text and parsed dishes, returning fingerprint id"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO menu_fingerprints (menu_upload_id, dhash, ocr_text, dishes)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            """, (upload_id, dhash, ocr_text, Json(dishes)))
+            
+            fingerprint_id = cur.fetchone()['id']
+            conn.commit()
+            return fingerprint_id
+            
+    except Exception as e:
+        report_error(f"Failed to store menu fingerprint: {str(e)}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def load_menu_fingerprints():
+    """Load all (id, dhash) pairs for the in-memory near-duplicate index; None if the database is unavailable"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, dhash FROM menu_fingerprints")
+            return cur.fetchall()
+            
+    except Exception as e:
+        report_error(f"Failed to load menu fingerprints: {str(e)}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def get_menu_fingerprint(fingerprint_id):
+    """Fetch OCR text and parsed dishes for a stored fingerprint"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT ocr_text, dishes 
+                FROM menu_fingerprints 
+                WHERE id = %s
+            """, (fingerprint_id,))
+            
+            return cur.fetchone()
+            
+    except Exception as e:
+        report_error(f"Failed to load menu fingerprint: {str(e)}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def get_cached_dish_images(cache_keys):
+    """Fetch image cache index rows for the given keys, counting the hits"""
+    conn = get_db_connection()
+    if not conn:
+        return []
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE dish_image_cache 
+                SET hit_count = hit_count + 1 
+                WHERE cache_key = ANY(%s)
+                RETURNING cache_key, image_url
+            """, (list(cache_keys),))
+            
+            rows = cur.fetchall()
+            conn.commit()
+            return rows
+            
+    except Exception as e:
+        report_error(f"Failed to read image cache: {str(e)}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+def store_dish_image_index(cache_key, dish_name_normalized, style_prompt, resolution, image_url):
+    """Index a cached dish image reference (or remote URL)"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO dish_image_cache (
+                    cache_key, dish_name_normalized, style_prompt, resolution, image_url
+                ) VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    image_url = EXCLUDED.image_url
+            """, (cache_key, dish_name_normalized, style_prompt, resolution, image_url))
+            
+            conn.commit()
+            return True
+            
+    except Exception as e:
+        report_error(f"Failed to store image cache entry: {str(e)}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def store_image_blob(content_hash, mime_type, data):
+    """Store an image blob once per content hash"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO image_blobs (content_hash, mime_type, data)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (content_hash) DO NOTHING
+            """, (content_hash, mime_type, psycopg2.Binary(data)))
+            
+            conn.commit()
+            return True
+            
+    except Exception as e:
+        report_error(f"Failed to store image blob: {str(e)}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def get_image_blob(content_hash):
+    """Fetch image bytes by content hash"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT data FROM image_blobs WHERE content_hash = %s", (content_hash,))
+            row = cur.fetchone()
+            return bytes(row['data']) if row else None
+            
+    except Exception as e:
+        report_error(f"Failed to load image blob: {str(e)}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+def get_translation_memory_entries(source_hashes, target_language):
+    """Fetch remembered translations for the given source hashes"""
+    conn = get_db_connection()
+    if not conn:
+        return []
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT source_hash, translated_text 
+                FROM translation_memory 
+                WHERE target_language = %s AND source_hash = ANY(%s)
+            """, (target_language, list(source_hashes)))
+            
+            return cur.fetchall()
+            
+    except Exception as e:
+        report_error(f"Failed to read translation memory: {str(e)}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+def store_translation_memory_entries(rows):
+    """Upsert (source_hash, target_language, source_text, translated_text) rows in one round trip"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO translation_memory (source_hash, target_language, source_text, translated_text)
+                VALUES %s
+                ON CONFLICT (source_hash, target_language) DO UPDATE SET
+                    translated_text = EXCLUDED.translated_text,
+                    updated_at = NOW()
+            """, rows, page_size=max(len(rows), 1))
+            
+            conn.commit()
+            return True
+            
+    except Exception as e:
+        report_error(f"Failed to store translation memory: {str(e)}")
+        return False
+    finally:
+        release_db_connection(conn)
+
+def asyncpg_dsn(dsn):
+    """asyncpg treats unknown query parameters as server settings; drop the libpq-only ones"""
+    parts = urlsplit(dsn)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'channel_binding']
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+class AsyncDatabasePool:
+    """Per-event-loop asyncpg pools; loops without asyncpg fall back to the psycopg2 pool"""
+
+    def __init__(self):
+        self._pools = weakref.WeakKeyDictionary()  # loop -> asyncpg pool, or False if unavailable
+        self._failed_at = weakref.WeakKeyDictionary()  # loop -> monotonic time pool creation last failed
+
+    def _retry_due(self, loop):
+        failed_at = self._failed_at.get(loop)
+        return failed_at is not None and time.monotonic() - failed_at >= ASYNC_POOL_RETRY_COOLDOWN
+
+    async def get_pool(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._pools or self._retry_due(loop):
+            self._pools[loop] = False  # Claimed; concurrent callers use the fallback meanwhile
+            self._failed_at.pop(loop, None)
+            try:
+                import asyncpg
+            except ImportError:
+                print("⚠️  asyncpg not installed, using psycopg2 pool")
+                return None
+            try:
+                min_size, max_size = get_pool_sizes()
+                self._pools[loop] = await asyncpg.create_pool(
+                    asyncpg_dsn(os.getenv('DATABASE_URL')),
+                    min_size=min_size,
+                    max_size=max_size,
+                    max_inactive_connection_lifetime=300,
+                    command_timeout=POOL_CHECKOUT_TIMEOUT,
+                    timeout=POOL_CHECKOUT_TIMEOUT
+                )
+                print(f"🐘 asyncpg pool ready ({min_size}-{max_size} connections)")
+            except Exception as e:
+                # Usually the database is briefly unreachable; try again after the cooldown
+                self._failed_at[loop] = time.monotonic()
+                print(f"⚠️  asyncpg pool unavailable, using psycopg2 pool for {ASYNC_POOL_RETRY_COOLDOWN}s: {str(e)}")
+        return self._pools[loop] or None
+
+    async def close_loop_pool(self):
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool:
+            await pool.close()
+
+# Global async pool manager instance
+_async_db_pool = AsyncDatabasePool()
+
+async def close_async_db_pool():
+    """Close the asyncpg pool bound to the running loop"""
+    await _async_db_pool.close_loop_pool()
+
+async def store_menu_upload_async(image_name, selected_language, image_hash=None, pipeline_version=None):
+    """Async store_menu_upload on the running loop's asyncpg pool"""
+    pool = await _async_db_pool.get_pool()
+    if pool is None:
+        return await asyncio.to_thread(store_menu_upload, image_name, selected_language, image_hash, pipeline_version)
+    
+    try:
+        return await pool.fetchval("""
+            INSERT INTO menu_uploads (original_image_url, selected_language, image_hash, pipeline_version)
+            VALUES ($1, $2, $3, $4)
+            RETURNING id
+        """, image_name, selected_language, image_hash, pipeline_version)
+            
+    except Exception as e:
+        print(f"❌ Failed to store upload: {str(e)}")
+        return None
+
+async def store_processed_dishes_async(upload_id, dishes, status='completed'):
+    """Async store_processed_dishes: COPY the dishes and update status in one transaction"""
+    pool = await _async_db_pool.get_pool()
+    if pool is None:
+        return await asyncio.to_thread(store_processed_dishes, upload_id, dishes, status)
+    
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if dishes:
+                    await conn.copy_records_to_table(
+                        'processed_dishes',
+                        records=processed_dish_rows(upload_id, dishes),
+                        columns=PROCESSED_DISH_COLUMNS
+                    )
+                if status:
+                    await conn.execute("""
+                        UPDATE menu_uploads 
+                        SET processing_status = $1 
+                        WHERE id = $2
+                    """, status, upload_id)
+        return True
+            
+    except Exception as e:
+        print(f"❌ Failed to store dishes: {str(e)}")
+        return False
+
+async def update_processing_status_async(upload_id, status):
+    """Async update_processing_status"""
+    pool = await _async_db_pool.get_pool()
+    if pool is None:
+        return await asyncio.to_thread(update_processing_status, upload_id, status)
+    
+    try:
+        await pool.execute("""
+            UPDATE menu_uploads 
+            SET processing_status = $1 
+            WHERE id = $2
+        """, status, upload_id)
+        return True
+            
+    except Exception as e:
+        print(f"❌ Failed to update status: {str(e)}")
+        return False
+
+async def update_dish_image_async(upload_id, display_order, image_url):
+    """Async update_dish_image"""
+    pool = await _async_db_pool.get_pool()
+    if pool is None:
+        return await asyncio.to_thread(update_dish_image, upload_id, display_order, image_url)
+    
+    try:
+        await pool.execute("""
+            UPDATE processed_dishes 
+            SET generated_image_url = $1 
+            WHERE menu_upload_id = $2 AND display_order = $3
+        """, image_url, upload_id, display_order)
+        return True
+            
+    except Exception as e:
+        print(f"❌ Failed to store dish image: {str(e)}")
+        return False
@@ -0,0 +1,158 @@
+"""
+Local dish text embeddings and a nearest-neighbour index over cached images
+Hashed character n-gram TF-IDF vectors in NumPy let "Salmon, grilled" reuse
+the image generated for "Grilled Atlantic Salmon" without any external service
+"""
+
+import os
+import json
+import zlib
+import atexit
+import threading
+import numpy as np
+from image_cache import normalize_dish_name
+
+EMBEDDING_DIM = 2048
+NGRAM_SIZES = (2, 3, 4)
+DESCRIPTION_WEIGHT = 0.3  # Names decide the dish; descriptions only nudge
+DEFAULT_SIMILARITY_THRESHOLD = 0.75  # "Salmon, grilled" vs "Grilled Atlantic Salmon" scores ~0.76
+INITIAL_CAPACITY = 256
+SAVE_EVERY = 64  # Additions between writes; the rest are flushed at exit
+
+def _bucket(feature):
+    """Stable hash bucket (Python's hash() is salted per process)"""
+    return zlib.crc32(feature.encode('utf-8')) % EMBEDDING_DIM
+
+def _add_ngrams(vector, text, weight):
+    for word in normalize_dish_name(text).split():
+        padded = f"<{word}>"
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                vector[_bucket(padded[i:i + n])] += weight
+
+def embed_dish_text(name, description=""):
+    """Term-frequency vector of word-bounded character n-grams (order-insensitive)"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    _add_ngrams(vector, name, 1.0)
+    if description:
+        _add_ngrams(vector, description, DESCRIPTION_WEIGHT)
+    return np.log1p(vector)  # Sublinear tf so repeated n-grams don't dominate
+
+class DishEmbeddingIndex:
+    """Append-only vector index persisted as an .npy matrix plus a JSON key list.
+
+    The matrix is memory-mapped on load and copied into a buffer that grows
+    geometrically on the first addition. Additions are written every
+    SAVE_EVERY entries and at exit. IDF weights are derived from the
+    indexed vectors themselves and refreshed lazily after additions.
+    """
+
+    def __init__(self, directory):
+        self.vectors_path = os.path.join(directory, "dish_embeddings.npy")
+        self.entries_path = os.path.join(directory, "dish_embeddings.json")
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)  # Rows past len(_entries) are spare capacity
+        self._entries = []  # [{'cache_key', 'scope'}] aligned with vector rows
+        self._keys = set()
+        self._unsaved = 0
+        self._weighted = None  # IDF-weighted, L2-normalised rows
+        self._idf = None
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.entries_path)):
+            return
+        try:
+            vectors = np.load(self.vectors_path, mmap_mode='r')
+            with open(self.entries_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if vectors.shape == (len(entries), EMBEDDING_DIM):
+                self._vectors, self._entries = vectors, entries
+                self._keys = {entry['cache_key'] for entry in entries}
+                print(f"🧭 Loaded {len(entries)} dish embeddings")
+            else:
+                print("⚠️  Dish embedding index is inconsistent, starting fresh")
+        except Exception as e:
+            print(f"⚠️  Failed to load dish embedding index: {str(e)}")
+
+    def _rows(self):
+        return self._vectors[:len(self._entries)]
+
+    def _save(self):
+        vectors_tmp = self.vectors_path + ".tmp.npy"
+        entries_tmp = self.entries_path + ".tmp"
+        np.save(vectors_tmp, np.asarray(self._rows()))
+        with open(entries_tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(vectors_tmp, self.vectors_path)
+        os.replace(entries_tmp, self.entries_path)
+        self._unsaved = 0
+
+    def flush(self):
+        """Write additions not yet persisted"""
+        with self._lock:
+            if not self._unsaved:
+                return
+            try:
+                self._save()
+            except Exception as e:
+                print(f"⚠️  Failed to save dish embedding index: {str(e)}")
+
+    def _ensure_capacity(self, rows):
+        """Grow the buffer geometrically so additions are amortised O(1); also detaches a memory map"""
+        if rows <= self._vectors.shape[0] and not isinstance(self._vectors, np.memmap):
+            return
+        capacity = max(INITIAL_CAPACITY, rows, 2 * self._vectors.shape[0])
+        grown = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)
+        grown[:len(self._entries)] = self._rows()
+        self._vectors = grown
+
+    def _refresh_weights(self):
+        if self._weighted is not None:
+            return
+        vectors = np.asarray(self._rows())
+        document_frequency = np.count_nonzero(vectors, axis=0)
+        self._idf = (np.log((1 + len(self._entries)) / (1 + document_frequency)) + 1).astype(np.float32)
+        weighted = vectors * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        self._weighted = weighted / np.maximum(norms, 1e-9)
+
+    def add(self, cache_key, scope, vector):
+        """Index an image's dish vector; scope keeps style/resolution variants apart"""
+        with self._lock:
+            if cache_key in self._keys:
+                return
+            self._ensure_capacity(len(self._entries) + 1)
+            self._vectors[len(self._entries)] = vector
+            self._entries.append({'cache_key': cache_key, 'scope': scope})
+            self._keys.add(cache_key)
+            self._weighted = None
+            self._unsaved += 1
+            if self._unsaved >= SAVE_EVERY:
+                self._save()
+
+    def nearest(self, vector, scope):
+        """Return (cache_key, cosine similarity) of the closest entry in scope, or None"""
+        with self._lock:
+            if not self._entries:
+                return None
+            self._refresh_weights()
+
+            in_scope = np.array([entry['scope'] == scope for entry in self._entries])
+            if not in_scope.any():
+                return None
+
+            query = vector * self._idf
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return None
+
+            similarities = self._weighted @ (query / norm)
+            similarities[~in_scope] = -1.0
+            best = int(np.argmax(similarities))
+            return self._entries[best]['cache_key'], float(similarities[best])
+
+def get_similarity_threshold():
+    return float(os.getenv('IMAGE_SIMILARITY_THRESHOLD', DEFAULT_SIMILARITY_THRESHOLD))
@@ -0,0 +1,117 @@
+"""
+Process-wide HTTP connection pool manager shared by every service
+Reuses TLS connections (keep-alive, HTTP/2 where available) instead of
+building a new AsyncOpenAI client or aiohttp session per call
+"""
+
+import os
+import asyncio
+import weakref
+import aiohttp
+import httpx
+from openai import AsyncOpenAI
+
+DEFAULT_MAX_CONNECTIONS = 50
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 10
+KEEPALIVE_SECONDS = 60
+
+def http2_available():
+    """HTTP/2 needs the optional h2 package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class ConnectionPoolManager:
+    """Per-event-loop registry of pooled HTTP clients.
+
+    Pooled connections are bound to the loop that created them, so each
+    running loop gets its own clients and they are closed together.
+    """
+
+    def __init__(self):
+        self._pools = weakref.WeakKeyDictionary()  # loop -> {key: client}
+
+    def _loop_pools(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._pools:
+            self._pools[loop] = {}
+        return self._pools[loop]
+
+    def _limits(self):
+        max_connections = int(os.getenv('HTTP_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS))
+        per_host = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', DEFAULT_MAX_CONNECTIONS_PER_HOST))
+        return max_connections, per_host
+
+    def get_openai_client(self, base_url, api_key, timeout=60.0):
+        """Shared AsyncOpenAI client for base_url on the running loop"""
+        pools = self._loop_pools()
+        key = ('openai', base_url, api_key)
+
+        if key not in pools:
+            _, per_host = self._limits()
+            http_client = httpx.AsyncClient(
+                http2=http2_available(),
+                limits=httpx.Limits(
+                    max_connections=per_host,  # One client per host, so this is the per-host cap
+                    max_keepalive_connections=per_host,
+                    keepalive_expiry=KEEPALIVE_SECONDS
+                ),
+                timeout=timeout
+            )
+            pools[key] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                http_client=http_client
+            )
+
+        client = pools[key]
+        # Per-caller timeouts share the same connection pool
+        return client if client.timeout == timeout else client.with_options(timeout=timeout)
+
+    def get_aiohttp_session(self):
+        """Shared aiohttp session with keep-alive and per-host limits on the running loop"""
+        pools = self._loop_pools()
+        session = pools.get('aiohttp')
+
+        if session is None or session.closed:
+            max_connections, per_host = self._limits()
+            connector = aiohttp.TCPConnector(
+                limit=max_connections,
+                limit_per_host=per_host,
+                keepalive_timeout=KEEPALIVE_SECONDS,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            pools['aiohttp'] = session
+
+        return session
+
+    async def close_loop_pools(self):
+        """Close every pooled client bound to the running loop"""
+        loop = asyncio.get_running_loop()
+        pools = self._pools.pop(loop, {})
+
+        for key, client in pools.items():
+            try:
+                await client.close()
+            except Exception as e:
+                print(f"⚠️  Failed to close pooled client {key}: {str(e)}")
+
+# Global pool manager instance
+_pool_manager = ConnectionPoolManager()
+
+def get_pool_manager():
+    return _pool_manager
+
+def get_openai_client(base_url, api_key, timeout=60.0):
+    return _pool_manager.get_openai_client(base_url, api_key, timeout)
+
+def get_aiohttp_session():
+    return _pool_manager.get_aiohttp_session()
+
+async def close_pools():
+    """Close pooled connections for the running loop; call before the loop shuts down"""
+    await _pool_manager.close_loop_pools()
@@ -0,0 +1,172 @@
+"""
+Dish image cache shared across menus
+Images are keyed by normalised dish name, style prompt and resolution, so
+common dishes ("Caesar Salad", "Tiramisu") are generated by FLUX only once.
+The Postgres index maps keys to image store references (see image_store.py)
+"""
+
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from image_store import store_image_data_url, is_image_reference, image_available
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".snapmenu", "images")
+DEFAULT_RESOLUTION = "512x512"
+
+def normalize_dish_name(name):
+    """Lowercase, strip accents, numbering and punctuation so menu variants share a key"""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = name.lower()
+    # "12. Tiramisu", "No. 12 Tiramisu" -> "tiramisu"; a bare number is part of the name ("7 Up")
+    name = re.sub(r'^\s*(?:(?:no\.?|#)\s*\d+[.)]?|\d+[.)])\s+', '', name)
+    name = re.sub(r'[^\w\s]', ' ', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+def image_cache_key(dish_name, style_prompt="", resolution=DEFAULT_RESOLUTION):
+    normalized = normalize_dish_name(dish_name)
+    return hashlib.sha256(f"{normalized}|{style_prompt}|{resolution}".encode('utf-8')).hexdigest()
+
+def cache_name_for_dish(dish):
+    """Cache on the original name so every target language shares the image"""
+    return dish.get('name_original') or dish.get('name_translated') or ''
+
+class DishImageCache:
+    """Postgres index of image references with an in-process memo"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._memo = {}  # cache_key -> image URL
+        self._lock = threading.Lock()
+        self._embeddings = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def embeddings(self):
+        """Nearest-neighbour index over cached dishes, loaded on first use"""
+        if self._embeddings is None:
+            from dish_embeddings import DishEmbeddingIndex
+            self._embeddings = DishEmbeddingIndex(self.cache_dir)
+        return self._embeddings
+
+    def lookup(self, cache_keys):
+        """Return {cache_key: image_url} for every key with a cached image.
+
+        The index is shared across instances but file blobs are local, so an
+        indexed reference whose blob is missing here counts as a miss.
+        """
+        found = {}
+        with self._lock:
+            for key in cache_keys:
+                if key in self._memo:
+                    found[key] = self._memo[key]
+
+        missing = [key for key in cache_keys if key not in found]
+        if missing:
+            from database import get_cached_dish_images
+            for row in get_cached_dish_images(missing):
+                if image_available(row.get('image_url')):
+                    found[row['cache_key']] = row['image_url']
+
+            with self._lock:
+                for key in missing:
+                    if key in found:
+                        self._memo[key] = found[key]
+
+        return found
+
+    def store(self, cache_key, dish_name, style_prompt, resolution, image_url):
+        """Index a generated image by store reference; remote URLs are indexed as-is"""
+        image_url = store_image_data_url(image_url)
+        if not (is_image_reference(image_url) or image_url.startswith('http')):
+            return
+
+        from database import store_dish_image_index
+        store_dish_image_index(cache_key, normalize_dish_name(dish_name), style_prompt, resolution, image_url)
+
+        with self._lock:
+            self._memo[cache_key] = image_url
+
+# Global cache instance
+_image_cache = None
+
+def get_image_cache():
+    """Return the dish image cache, or None when IMAGE_CACHE is disabled"""
+    global _image_cache
+    if os.getenv('IMAGE_CACHE', 'true').lower() != 'true':
+        return None
+    if _image_cache is None:
+        cache_dir = os.path.expanduser(os.getenv('IMAGE_CACHE_DIR', DEFAULT_CACHE_DIR))
+        _image_cache = DishImageCache(cache_dir)
+    return _image_cache
+
+def embedding_scope(style_prompt, resolution):
+    return f"{style_prompt}|{resolution}"
+
+def lookup_similar_dish_images(cache, dishes, style_prompt, resolution):
+    """Reuse the image of the most similar cached dish when it clears the similarity threshold"""
+    from dish_embeddings import embed_dish_text, get_similarity_threshold
+
+    threshold = get_similarity_threshold()
+    scope = embedding_scope(style_prompt, resolution)
+    matches = {}
+    for dish in dishes:
+        vector = embed_dish_text(cache_name_for_dish(dish), dish.get('description_original') or dish.get('description', ''))
+        nearest = cache.embeddings.nearest(vector, scope)
+        if nearest and nearest[1] >= threshold:
+            matches[id(dish)] = nearest
+
+    found = cache.lookup(list({key for key, _ in matches.values()}))
+    reused = {}
+    for dish in dishes:
+        if id(dish) in matches and matches[id(dish)][0] in found:
+            key, similarity = matches[id(dish)]
+            reused[id(dish)] = found[key]
+            print(f"🧭 Reusing similar image for {cache_name_for_dish(dish)} (similarity {similarity:.2f})")
+    return reused
+
+def lookup_dish_images(dishes, style_prompt="", resolution=DEFAULT_RESOLUTION):
+    """Return {id(dish): image_url} for dishes with a cached image, exact or semantically similar.
+
+    Failures count as misses.
+    """
+    try:
+        cache = get_image_cache()
+        if cache is None or not dishes:
+            return {}
+
+        keys = {id(dish): image_cache_key(cache_name_for_dish(dish), style_prompt, resolution) for dish in dishes}
+        found = cache.lookup(list(set(keys.values())))
+        images = {dish_id: found[key] for dish_id, key in keys.items() if key in found}
+
+        misses = [dish for dish in dishes if id(dish) not in images]
+        if misses:
+            images.update(lookup_similar_dish_images(cache, misses, style_prompt, resolution))
+        return images
+
+    except Exception as e:
+        print(f"⚠️  Image cache lookup failed: {str(e)}")
+        return {}
+
+def store_dish_image(dish, style_prompt, image_url, resolution=DEFAULT_RESOLUTION):
+    """Cache a freshly generated image for this dish"""
+    try:
+        cache = get_image_cache()
+        if cache is None or not image_url:
+            return
+
+        dish_name = cache_name_for_dish(dish)
+        if not normalize_dish_name(dish_name):
+            return
+
+        cache_key = image_cache_key(dish_name, style_prompt, resolution)
+        cache.store(cache_key, dish_name, style_prompt, resolution, image_url)
+
+        from dish_embeddings import embed_dish_text
+        vector = embed_dish_text(dish_name, dish.get('description_original') or dish.get('description', ''))
+        cache.embeddings.add(cache_key, embedding_scope(style_prompt, resolution), vector)
+
+    except Exception as e:
+        print(f"⚠️  Image cache store failed: {str(e)}")
@@ -3,150 +3,283 @@ import asyncio
 import time
 import random
 import os
+import math
+import weakref
+from http_pool import get_aiohttp_session
+from image_cache import lookup_dish_images, store_dish_image
+from image_store import store_image_data_url
+from adaptive_concurrency import get_adaptive_semaphore, LatencyTracker, HedgeBudget
 
-async def generate_dish_images(dishes, timeout=30, max_images=20, style_prompt=""):
-    """Generate images for dishes with aggressive retry to ensure minimum 3 images"""
-    start_time = time.time()
-    min_images = 3  # Minimum required images
-    max_timeout = 30  # Hard maximum timeout
+class FluxBackpressure(Exception):
+    """FLUX signalled overload (429/5xx); callers should back off"""
+    
+    def __init__(self, status):
+        super().__init__(f"FLUX overloaded (HTTP {status})")
+        self.status = status
+
+BACKPRESSURE_STATUSES = {429, 502, 503, 504}
+FLUX_REQUEST_TIMEOUT = 15
+MIN_IMAGES = 3
+IMAGE_CATEGORY_SPREAD = 3  # Categories a streaming menu is assumed to have when capping slots per category
+
+# Recent FLUX latencies; a request slower than their p-th percentile gets a duplicate
+flux_latencies = LatencyTracker()
+
+# Request bodies FLUX deployments accept, probed in order
+FLUX_PAYLOAD_FORMATS = [
+    # Format 1: Standard FLUX format
+    lambda prompt: {
+        "prompt": prompt,
+        "num_inference_steps": 20,
+        "guidance_scale": 7.5,
+        "width": 512,
+        "height": 512
+    },
+    # Format 2: Simplified format
+    lambda prompt: {
+        "prompt": prompt,
+        "steps": 20,
+        "guidance": 7.5
+    },
+    # Format 3: Minimal format
+    lambda prompt: {
+        "prompt": prompt
+    }
+]
+FLUX_RESPONSE_SHAPES = ['images', 'image_url', 'url', 'image', 'data.url']
+SCHEMA_REJECTION_STATUSES = {400, 415, 422}  # What a server says when the request body has the wrong shape
+
+# Negotiated per endpoint for the process:
+# {endpoint: {'payload': format index, 'response': shape, 'rejections': consecutive schema rejections}}
+flux_capabilities = {}
+_probe_locks = weakref.WeakKeyDictionary()  # loop -> {endpoint: asyncio.Lock}
+
+def get_flux_probe_lock(endpoint):
+    locks = _probe_locks.setdefault(asyncio.get_running_loop(), {})
+    if endpoint not in locks:
+        locks[endpoint] = asyncio.Lock()
+    return locks[endpoint]
+
+def flux_configured():
+    return bool(os.getenv('FLUX_ENDPOINT') and os.getenv('KOYEB_API_KEY'))
+
+def get_flux_limiter():
+    """AIMD limiter shared by every FLUX call on the running loop"""
+    return get_adaptive_semaphore(
+        'flux',
+        initial_limit=int(os.getenv('FLUX_INITIAL_CONCURRENCY', 4)),
+        max_limit=int(os.getenv('FLUX_MAX_CONCURRENCY', 16))
+    )
+
+def create_hedge_budget(image_count):
+    """Per-menu hedge allowance: FLUX_HEDGE_BUDGET x images, at least MIN_IMAGES so the
+    stragglers holding up the minimum can be hedged, but never more than one per image"""
+    ratio = float(os.getenv('FLUX_HEDGE_BUDGET', 0.2))
+    if ratio <= 0:
+        return None
+    return HedgeBudget(min(image_count, max(MIN_IMAGES, math.ceil(image_count * ratio))))
+
+def build_dish_prompt(dish, style_prompt="", fast=False):
+    """Full styled prompt, or a short one that FLUX renders faster"""
+    dish_name = dish.get('name_translated') or dish.get('name_original', '')
+    if fast:
+        return f"food photography, {dish_name}"
     
-    # Prioritize dishes - spread across categories if possible
-    priority_dishes = prioritize_dishes_for_images(dishes, max_images)
+    description = (dish.get('enhanced_description') or 
+                 dish.get('description_translated') or 
+                 dish.get('description_original', ''))
+    return f"{style_prompt}. Dish: {dish_name}. {description}"
+
+async def generate_dish_image(dish, style_prompt="", timeout=10, hedge_budget=None, keep_trying=None):
+    """Generate one dish image for the per-dish pipeline, retrying once with a fast prompt
+
+    Pass the menu's HedgeBudget (see create_hedge_budget) to allow hedged requests.
+    After the fast retry the dish keeps retrying until `timeout` only while
+    `keep_trying()` is true (e.g. the menu has fewer than MIN_IMAGES images).
+    """
+    start_time = time.time()
+    deadline = start_time + timeout
     
-    # Initialize all dishes with None image URLs
-    for dish in dishes:
-        dish['generated_image_url'] = None
+    cached_images = await asyncio.to_thread(lookup_dish_images, [dish], style_prompt)
+    if cached_images:
+        dish['generated_image_url'] = cached_images[id(dish)]
+        return True
     
-    print(f"🎯 MISSION: Generate minimum {min_images} images within {max_timeout}s")
+    if not flux_configured():
+        dish['generated_image_url'] = get_placeholder_image_url()
+        return True
     
-    # Aggressive Phase: Keep trying until we get 3 images or hit max timeout
-    successful_count = 0
-    attempt_round = 1
-    dish_pool = priority_dishes.copy()  # Pool of dishes to try
+    dish_name = dish.get('name_translated') or dish.get('name_original', '')
+    attempt = 0
     
-    while successful_count < min_images and (time.time() - start_time) < max_timeout:
-        elapsed = time.time() - start_time
-        remaining = max_timeout - elapsed
+    while deadline - time.time() >= 1:
+        if attempt >= 2:
+            if not (keep_trying and keep_trying()):
+                break  # Extra retries only to reach the minimum
+            await asyncio.sleep(0.5)  # Brief pause before retrying this dish
         
-        print(f"🔄 Round {attempt_round}: {successful_count}/{min_images} images so far, {remaining:.1f}s remaining")
+        try:
+            image_url = await flux_generate_adaptive(
+                build_dish_prompt(dish, style_prompt, fast=attempt > 0), deadline, hedge_budget
+            )
+        except FluxBackpressure:
+            image_url = None
+            await backpressure_backoff(attempt, deadline)
         
-        if remaining < 5:  # Less than 5 seconds left, be more aggressive
-            print("⚡ SPRINT MODE: Using simple prompts for speed")
-            
-        # Try to generate images for dishes that don't have them yet
-        failed_dishes = [d for d in dish_pool if not d.get('generated_image_url')]
+        if image_url:
+            dish['generated_image_url'] = image_url
+            print(f"✅ Image ready: {dish_name} ({time.time() - start_time:.1f}s, attempt {attempt + 1})")
+            await cache_generated_image(dish, style_prompt, image_url)
+            return True
+        attempt += 1
+    
+    print(f"❌ No image for {dish_name}")
+    return False
+
+async def backpressure_backoff(attempt, deadline):
+    """Jittered exponential backoff after FLUX pushed back, never sleeping past the deadline"""
+    backoff = 0.5 * 2 ** attempt + random.random() * 0.5
+    await asyncio.sleep(min(backoff, max(0, deadline - time.time())))
+
+async def cache_generated_image(dish, style_prompt, image_url):
+    """Share a real FLUX image with future menus (placeholders are never cached)"""
+    if image_url and image_url != get_placeholder_image_url():
+        await asyncio.to_thread(store_dish_image, dish, style_prompt, image_url)
+
+async def flux_generate_adaptive(prompt, deadline, hedge_budget=None):
+    """One FLUX request under the adaptive limiter; returns an image URL or None.
+
+    Successful latencies feed the limiter; 429/5xx and timeouts shrink it
+    and FluxBackpressure is re-raised so the caller can back off. Stragglers
+    are hedged while hedge_budget allows.
+    """
+    limiter = get_flux_limiter()
+    async with limiter.slot():
+        remaining = deadline - time.time()
+        if remaining < 1:
+            return None
         
-        if not failed_dishes:
-            # All priority dishes tried, expand pool
-            failed_dishes = [d for d in dishes if not d.get('generated_image_url')]
-            if not failed_dishes:
-                break  # All dishes have been tried
+        request_timeout = min(remaining, FLUX_REQUEST_TIMEOUT)
+        request_start = time.time()
+        try:
+            image_url = await asyncio.wait_for(flux_hedged_request(prompt, hedge_budget), timeout=request_timeout)
+        except FluxBackpressure as e:
+            limiter.record_overload(f"HTTP {e.status}")
+            raise
+        except asyncio.TimeoutError:
+            if request_timeout >= FLUX_REQUEST_TIMEOUT:  # Not just our own deadline running out
+                limiter.record_overload("timeout")
+            print(f"   ⏰ Individual timeout ({request_timeout:.1f}s)")
+            return None
         
-        # Limit attempts per round to avoid infinite loops
-        dishes_this_round = failed_dishes[:min(5, min_images - successful_count + 2)]
+        if image_url:
+            limiter.record_success(time.time() - request_start)
+        return image_url
+
+async def timed_flux_request(prompt):
+    """flux_request that records its latency when it produces an image"""
+    request_start = time.time()
+    image_url = await flux_request(prompt)
+    if image_url:
+        flux_latencies.record(time.time() - request_start)
+    return image_url
+
+async def flux_hedged_request(prompt, hedge_budget=None):
+    """Send a FLUX request and, if it outlives the recent p-th percentile latency,
+    a duplicate; the first image wins and the other request is cancelled.
+
+    A hedge takes its own limiter slot, and is only sent if one is free
+    right now and the menu's hedge_budget has room, so hedging never
+    exceeds the adaptive limit or doubles the load on FLUX.
+    """
+    primary = asyncio.ensure_future(timed_flux_request(prompt))
+    hedge_after = flux_latencies.percentile(float(os.getenv('FLUX_HEDGE_PERCENTILE', 90)))
+    if hedge_budget is None or hedge_after is None:
+        return await primary
+    
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return await primary
         
-        for dish in dishes_this_round:
-            if successful_count >= min_images:
-                break
-                
-            if (time.time() - start_time) >= max_timeout:
-                print("⏰ Hard timeout reached")
-                break
-            
-            try:
-                dish_name = dish.get('name_translated') or dish.get('name_original', '')
-                
-                # Choose prompt strategy based on time remaining and attempt round
-                if remaining < 10 or attempt_round > 2:
-                    # Use simple prompt for speed
-                    prompt = f"food photography, {dish_name}"
-                    print(f"⚡ FAST attempt {attempt_round}: {dish_name}")
-                else:
-                    # Use full prompt
-                    description = (dish.get('enhanced_description') or 
-                                 dish.get('description_translated') or 
-                                 dish.get('description_original', ''))
-                    prompt = f"{style_prompt}. Dish: {dish_name}. {description}"
-                    print(f"🔥 Full attempt {attempt_round}: {dish_name}")
-                
-                # Generate with shorter individual timeout as we get more aggressive
-                individual_timeout = max(3, min(10, remaining / 3))
-                image_url = await flux_generate_image_with_timeout(prompt, individual_timeout)
-                
-                if image_url:
-                    dish['generated_image_url'] = image_url
-                    successful_count += 1
-                    print(f"✅ SUCCESS {successful_count}/{min_images}: {dish_name} (Round {attempt_round})")
-                else:
-                    print(f"❌ Failed: {dish_name}")
-                    
-            except Exception as e:
-                print(f"❌ Error for {dish.get('name_translated', 'unknown')}: {str(e)}")
+        limiter = get_flux_limiter()
+        if not limiter.try_acquire():
+            return await primary  # No spare capacity: FLUX is at its limit or shedding load
+        if not hedge_budget.try_spend():
+            limiter.release()
+            return await primary
         
-        attempt_round += 1
+        print(f"   🏇 Hedging FLUX request after {hedge_after:.1f}s ({hedge_budget.remaining} hedges left)")
+        hedge = asyncio.ensure_future(timed_flux_request(prompt))
+        hedge.add_done_callback(lambda _: limiter.release())  # Runs even if cancelled before it starts
+        tasks.add(hedge)
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = error or task.exception()
+                elif task.result():
+                    return task.result()
         
-        # Quick break between rounds if we still need more
-        if successful_count < min_images and (time.time() - start_time) < max_timeout - 1:
-            await asyncio.sleep(0.5)  # Brief pause between rounds
+        if error is not None:
+            raise error
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+class ImageSlotPlanner:
+    """Spreads a menu's eager image slots across categories while dishes stream in
+
+    Menus usually arrive one category at a time, so handing slots to the
+    first dishes would only illustrate the starters. While streaming, each
+    category may claim at most `per_category` slots; dishes over that cap are
+    held back, and once every dish has arrived the slots still free go to
+    them round-robin by category (prioritize_dishes_for_images).
+    """
     
-    # Concurrent bonus phase if we achieved minimum and have time
-    final_elapsed = time.time() - start_time
-    remaining_time = max_timeout - final_elapsed
+    def __init__(self, slots, per_category=None):
+        self.slots = slots
+        self.per_category = per_category or max(1, math.ceil(slots / IMAGE_CATEGORY_SPREAD))
+        self.claimed = {}  # category -> slots taken while streaming
+        self.used = 0
+        self.held = []
+        self.failed = []  # Dishes whose image failed; retried after streaming while below MIN_IMAGES
+        self.succeeded = 0
     
-    if successful_count >= min_images and remaining_time > 3:
-        print(f"🎨 BONUS PHASE: {remaining_time:.1f}s left for additional images")
-        
-        bonus_dishes = [d for d in dishes if not d.get('generated_image_url')][:5]
-        if bonus_dishes:
-            semaphore = asyncio.Semaphore(3)  # More aggressive concurrency
-            
-            async def generate_bonus_image(dish):
-                async with semaphore:
-                    try:
-                        dish_name = dish.get('name_translated') or dish.get('name_original', '')
-                        prompt = f"food photography, {dish_name}, restaurant dish"
-                        image_url = await flux_generate_image_with_timeout(prompt, 4)
-                        
-                        if image_url:
-                            dish['generated_image_url'] = image_url
-                            print(f"🎁 Bonus image: {dish_name}")
-                            return True
-                        return False
-                    except:
-                        return False
-            
-            tasks = [generate_bonus_image(dish) for dish in bonus_dishes]
-            try:
-                await asyncio.wait_for(
-                    asyncio.gather(*tasks, return_exceptions=True),
-                    timeout=remaining_time - 1
-                )
-            except asyncio.TimeoutError:
-                print("⏰ Bonus phase timeout")
+    def claim(self, dish):
+        """True if the dish gets an image now; otherwise it is held for release_held()"""
+        category = dish.get('category', 'Other')
+        if self.used < self.slots and self.claimed.get(category, 0) < self.per_category:
+            self.claimed[category] = self.claimed.get(category, 0) + 1
+            self.used += 1
+            return True
+        self.held.append(dish)
+        return False
     
-    # Final count and status
-    final_count = sum(1 for dish in dishes if dish.get('generated_image_url'))
-    total_time = time.time() - start_time
+    def release_held(self):
+        """Held dishes that get the slots left once the menu is complete"""
+        chosen = prioritize_dishes_for_images(self.held, self.slots - self.used)
+        self.used += len(chosen)
+        self.held = [dish for dish in self.held if not any(dish is picked for picked in chosen)]
+        return chosen
     
-    print(f"🏁 FINAL RESULT: {final_count}/{len(dishes)} images in {total_time:.1f}s")
+    def record(self, dish, succeeded):
+        if succeeded:
+            self.succeeded += 1
+        else:
+            self.failed.append(dish)
     
-    if final_count >= min_images:
-        print(f"🎉 SUCCESS! Generated {final_count} images (minimum {min_images} achieved)")
-    else:
-        print(f"⚠️  PARTIAL SUCCESS: Only {final_count}/{min_images} minimum images generated")
+    def take_retries(self):
+        """Failed dishes to retry, if the menu is still short of MIN_IMAGES"""
+        retries, self.failed = (self.failed, []) if self.needs_more() else ([], self.failed)
+        return retries
     
-    return dishes
-
-async def flux_generate_image_with_timeout(prompt, timeout_seconds):
-    """Generate image with specific timeout"""
-    try:
-        return await asyncio.wait_for(
-            flux_generate_image(prompt),
-            timeout=timeout_seconds
-        )
-    except asyncio.TimeoutError:
-        print(f"   ⏰ Individual timeout ({timeout_seconds}s)")
-        return None
+    def needs_more(self):
+        """Whether failing dishes should keep retrying to reach MIN_IMAGES"""
+        return self.succeeded < MIN_IMAGES
 
 def prioritize_dishes_for_images(dishes, max_count):
     """Prioritize dishes for image generation to ensure variety across categories"""
@@ -177,100 +310,152 @@ def prioritize_dishes_for_images(dishes, max_count):
 
 async def flux_generate_image(prompt, resolution="512x512"):
     """Generate single image using FLUX.1 model on Koyeb"""
-    try:
-        endpoint = os.getenv('FLUX_ENDPOINT')
-        api_key = os.getenv('KOYEB_API_KEY')
-        
-        if not endpoint or not api_key:
-            print("Missing FLUX_ENDPOINT or KOYEB_API_KEY - using placeholder")
-            return get_placeholder_image_url()
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        # Try different payload formats
-        payloads_to_try = [
-            # Format 1: Standard FLUX format
-            {
-                "prompt": prompt,
-                "num_inference_steps": 20,
-                "guidance_scale": 7.5,
-                "width": 512,
-                "height": 512
-            },
-            # Format 2: Simplified format
-            {
-                "prompt": prompt,
-                "steps": 20,
-                "guidance": 7.5
-            },
-            # Format 3: Minimal format
-            {
-                "prompt": prompt
-            }
-        ]
-        
-        # Set timeout for individual image generation
-        timeout = aiohttp.ClientTimeout(total=15)  # Increased timeout for FLUX
-        
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            for i, payload in enumerate(payloads_to_try):
-                try:
-                    print(f"   Trying FLUX payload format {i+1}...")
-                    async with session.post(endpoint, json=payload, headers=headers) as response:
-                        print(f"   FLUX response status: {response.status}")
-                        
-                        if response.status == 200:
-                            result = await response.json()
-                            print(f"   FLUX response keys: {list(result.keys())}")
-                            
-                            # Handle FLUX /predict response format
-                            if 'images' in result and result['images']:
-                                # FLUX returns images as base64 strings or URLs
-                                image_data = result['images'][0]
-                                print(f"   Got image data (length: {len(str(image_data))})")
-                                
-                                if image_data.startswith('data:image'):
-                                    return image_data  # Already a data URL
-                                elif image_data.startswith('http'):
-                                    return image_data  # Direct URL
-                                else:
-                                    # Assume base64, convert to data URL
-                                    return f"data:image/png;base64,{image_data}"
-                            
-                            # Try other response formats as fallback
-                            image_url = (result.get('image_url') or 
-                                       result.get('url') or 
-                                       result.get('image') or
-                                       result.get('data', {}).get('url'))
-                            if image_url:
-                                print(f"   Found image URL in alternate format")
-                                return image_url
-                                
-                            print(f"   No image found in response: {result}")
-                            
-                        elif response.status == 404:
-                            print(f"FLUX endpoint not found: {endpoint}")
-                            break  # Don't try other payloads if endpoint doesn't exist
-                        else:
-                            error_text = await response.text()
-                            print(f"FLUX API attempt {i+1} failed with status {response.status}: {error_text[:200]}...")
-                            
-                except asyncio.TimeoutError:
-                    print(f"FLUX API attempt {i+1} timed out")
-                    continue
-                except Exception as e:
-                    print(f"FLUX API attempt {i+1} error: {str(e)}")
-                    continue
-        
-        print("All FLUX API attempts failed - using placeholder")
+    if not flux_configured():
+        print("Missing FLUX_ENDPOINT or KOYEB_API_KEY - using placeholder")
         return get_placeholder_image_url()
-                    
+    
+    try:
+        image_url = await flux_request(prompt, resolution)
     except Exception as e:
         print(f"Image generation error: {str(e)} - using placeholder")
         return get_placeholder_image_url()
+    
+    if image_url:
+        return image_url
+    print("All FLUX API attempts failed - using placeholder")
+    return get_placeholder_image_url()
+
+async def flux_request(prompt, resolution="512x512"):
+    """Call FLUX.1 on Koyeb with the endpoint's negotiated payload format.
+
+    The first call per endpoint probes the payload formats in order; later
+    calls make a single request and only re-probe after FLUX_REPROBE_AFTER
+    consecutive schema rejections. Returns the image URL (or image store
+    reference), None if no image was produced, and raises FluxBackpressure
+    on 429/502/503/504.
+    """
+    endpoint = os.getenv('FLUX_ENDPOINT')
+    api_key = os.getenv('KOYEB_API_KEY')
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    known = flux_capabilities.get(endpoint)
+    if known is None:
+        return await probe_flux_endpoint(endpoint, headers, prompt, resolution)
+    
+    outcome, image_url, shape = await post_flux_payload(
+        endpoint, headers, FLUX_PAYLOAD_FORMATS[known['payload']](prompt), known['response']
+    )
+    if outcome == 'ok':
+        known.update(response=shape, rejections=0)
+        return image_url
+    if outcome in ('transient', 'error'):
+        return None  # Timeouts, server and auth errors say nothing about the payload format
+    
+    if outcome == 'rejected':
+        # A single prompt can be refused; only a run of rejections means the schema changed
+        known['rejections'] += 1
+        if known['rejections'] < int(os.getenv('FLUX_REPROBE_AFTER', 3)):
+            return None
+    
+    if flux_capabilities.get(endpoint) is known:
+        del flux_capabilities[endpoint]
+    if outcome == 'not_found':
+        return None
+    print("   FLUX keeps rejecting the negotiated payload format - re-probing")
+    return await probe_flux_endpoint(endpoint, headers, prompt, resolution)
+
+async def probe_flux_endpoint(endpoint, headers, prompt, resolution):
+    """Try each payload format until one yields an image and remember it for the endpoint.
+
+    One probe runs per endpoint at a time; callers that waited on it make
+    their request with its result once the lock is released.
+    """
+    async with get_flux_probe_lock(endpoint):
+        if endpoint not in flux_capabilities:
+            for i, build_payload in enumerate(FLUX_PAYLOAD_FORMATS):
+                print(f"   Trying FLUX payload format {i+1}...")
+                outcome, image_url, shape = await post_flux_payload(endpoint, headers, build_payload(prompt))
+                if outcome == 'ok':
+                    flux_capabilities[endpoint] = {'payload': i, 'response': shape, 'rejections': 0}
+                    print(f"   🧭 FLUX endpoint accepts payload format {i+1} (response '{shape}')")
+                    return image_url
+                if outcome in ('not_found', 'error'):
+                    break  # Missing endpoint or bad credentials: other payloads won't help
+            
+            return None
+    
+    # Another request finished probing while we waited (never re-enter the lock from here)
+    return await flux_request(prompt, resolution)
+
+async def post_flux_payload(endpoint, headers, payload, preferred_shape=None):
+    """POST one payload to FLUX; returns (outcome, image URL or None, response shape).
+
+    outcome is 'ok', 'rejected' (400/415/422 or a response without an
+    image: the payload schema may be wrong), 'error' (other 4xx such as
+    401/403), 'not_found' or 'transient' (timeouts, network and server errors).
+    """
+    timeout = aiohttp.ClientTimeout(total=FLUX_REQUEST_TIMEOUT)
+    session = get_aiohttp_session()
+    try:
+        async with session.post(endpoint, json=payload, headers=headers, timeout=timeout) as response:
+            print(f"   FLUX response status: {response.status}")
+            
+            if response.status == 200:
+                result = await response.json()
+                image_data, shape = extract_flux_image(result, preferred_shape)
+                if image_data is None:
+                    print(f"   No image found in response: {str(result)[:200]}")
+                    return 'rejected', None, None
+                
+                print(f"   Got image data (length: {len(image_data)})")
+                if shape == 'images' and not image_data.startswith(('http', 'data:image')):
+                    # Assume base64, convert to data URL
+                    image_data = f"data:image/png;base64,{image_data}"
+                # Keep only a short reference; the WebP lives in the image store (URLs pass through)
+                return 'ok', await asyncio.to_thread(store_image_data_url, image_data), shape
+            
+            if response.status == 404:
+                print(f"FLUX endpoint not found: {endpoint}")
+                return 'not_found', None, None
+            if response.status in BACKPRESSURE_STATUSES:
+                raise FluxBackpressure(response.status)  # Overloaded; another payload won't help
+            
+            error_text = await response.text()
+            print(f"FLUX API request failed with status {response.status}: {error_text[:200]}...")
+            if response.status in SCHEMA_REJECTION_STATUSES:
+                return 'rejected', None, None
+            return ('transient' if response.status >= 500 else 'error'), None, None
+            
+    except FluxBackpressure:
+        raise
+    except asyncio.TimeoutError:
+        print("FLUX API request timed out")
+        return 'transient', None, None
+    except Exception as e:
+        print(f"FLUX API request error: {str(e)}")
+        return 'transient', None, None
+
+def extract_flux_image(result, preferred_shape=None):
+    """Find the image in a FLUX JSON response; returns (image data, response shape) or (None, None)"""
+    shapes = FLUX_RESPONSE_SHAPES
+    if preferred_shape:
+        shapes = [preferred_shape] + [shape for shape in FLUX_RESPONSE_SHAPES if shape != preferred_shape]
+    
+    for shape in shapes:
+        if shape == 'images':
+            # FLUX /predict returns images as base64 strings or URLs
+            value = result.get('images')[0] if result.get('images') else None
+        elif shape == 'data.url':
+            value = result['data'].get('url') if isinstance(result.get('data'), dict) else None
+        else:
+            value = result.get(shape)
+        if value and isinstance(value, str):
+            return value, shape
+    return None, None
 
 def get_placeholder_image_url():
     """Return placeholder image URL for dishes without generated images"""
@@ -8,6 +8,8 @@ import asyncio
 import time
 import aiohttp
 import os
+from http_pool import get_aiohttp_session
+from image_store import store_image_data_url
 
 async def generate_dish_images(dishes, timeout=30, min_images=3, max_images=20):
     """Simplified image generation with guaranteed minimum"""
@@ -91,16 +93,16 @@ async def generate_single_image(dish_name):
     
     try:
         timeout = aiohttp.ClientTimeout(total=8)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(endpoint, json=payload, headers=headers) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    if 'images' in result and result['images']:
-                        image_data = result['images'][0]
-                        if not image_data.startswith('data:image'):
-                            image_data = f"data:image/png;base64,{image_data}"
-                        return image_data
-                return None
+        session = get_aiohttp_session()
+        async with session.post(endpoint, json=payload, headers=headers, timeout=timeout) as response:
+            if response.status == 200:
+                result = await response.json()
+                if 'images' in result and result['images']:
+                    image_data = result['images'][0]
+                    if not image_data.startswith('data:image'):
+                        image_data = f"data:image/png;base64,{image_data}"
+                    return await asyncio.to_thread(store_image_data_url, image_data)
+            return None
     except:
         return None
 
@@ -0,0 +1,90 @@
+"""
+Pillow-based preprocessing for OCR uploads
+Shrinks menu photos before they are base64-encoded and sent to Pixtral
+"""
+
+import io
+import os
+from PIL import Image, ImageOps
+
+DEFAULT_MAX_LONG_EDGE = 2048
+DEFAULT_OUTPUT_FORMAT = "JPEG"
+DEFAULT_QUALITY = 85
+
+OUTPUT_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp"
+}
+
+def preprocess_menu_image(image_bytes, max_long_edge=None, output_format=None, quality=None, grayscale=None):
+    """Auto-rotate, downscale, normalise and re-encode a menu image for OCR.
+
+    Returns a dict with the processed bytes, their MIME type and size stats.
+    Falls back to the original bytes if decoding fails or re-encoding does not help.
+    """
+    max_long_edge = max_long_edge or int(os.getenv('OCR_MAX_LONG_EDGE', DEFAULT_MAX_LONG_EDGE))
+    output_format = (output_format or os.getenv('OCR_IMAGE_FORMAT', DEFAULT_OUTPUT_FORMAT)).upper()
+    quality = quality or int(os.getenv('OCR_IMAGE_QUALITY', DEFAULT_QUALITY))
+    if grayscale is None:
+        grayscale = os.getenv('OCR_GRAYSCALE', 'true').lower() == 'true'
+
+    if output_format not in OUTPUT_MIME_TYPES:
+        output_format = DEFAULT_OUTPUT_FORMAT
+
+    original_size = len(image_bytes)
+    original_mime = "image/jpeg"
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            original_mime = Image.MIME.get(img.format, original_mime)
+            img = normalise_image(img, max_long_edge, grayscale)
+            processed_bytes = encode_image(img, output_format, quality)
+
+    except Exception as e:
+        print(f"⚠️  Image preprocessing failed ({str(e)}), sending original")
+        return _preprocess_result(image_bytes, original_mime, original_size)
+
+    if len(processed_bytes) >= original_size:
+        print("🖼️  Preprocessing did not shrink image, sending original")
+        return _preprocess_result(image_bytes, original_mime, original_size)
+
+    result = _preprocess_result(processed_bytes, OUTPUT_MIME_TYPES[output_format], original_size)
+    print(f"🖼️  Preprocessed image: {original_size / 1024:.0f}KB → {len(processed_bytes) / 1024:.0f}KB "
+          f"({result['bytes_saved'] / 1024:.0f}KB saved, {result['mime_type']})")
+    return result
+
+def _preprocess_result(image_bytes, mime_type, original_size):
+    return {
+        'image_bytes': image_bytes,
+        'mime_type': mime_type,
+        'original_size': original_size,
+        'processed_size': len(image_bytes),
+        'bytes_saved': original_size - len(image_bytes)
+    }
+
+def normalise_image(img, max_long_edge, grayscale=True):
+    """Auto-rotate, downscale and optionally grayscale/contrast-stretch a PIL image"""
+    # Respect camera orientation so text is upright for the model
+    img = ImageOps.exif_transpose(img)
+
+    # Downscale large photos; menu text stays legible well below camera resolution
+    if max(img.size) > max_long_edge:
+        img.thumbnail((max_long_edge, max_long_edge), Image.Resampling.LANCZOS)
+
+    if grayscale:
+        return ImageOps.autocontrast(img.convert('L'), cutoff=1)
+    elif img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    return img
+
+def encode_image(img, output_format=DEFAULT_OUTPUT_FORMAT, quality=DEFAULT_QUALITY):
+    """Encode a PIL image as JPEG or WebP bytes"""
+    output = io.BytesIO()
+    if output_format.upper() == "WEBP":
+        img.save(output, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+def get_output_mime_type(output_format):
+    return OUTPUT_MIME_TYPES.get(output_format.upper(), OUTPUT_MIME_TYPES[DEFAULT_OUTPUT_FORMAT])
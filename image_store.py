@@ -0,0 +1,166 @@
+"""
+Content-addressed storage for generated dish images
+FLUX base64 data URLs are decoded once, re-encoded to WebP and stored on disk
+or in Postgres; dishes, database rows and session state only carry a short
+"imgref:<sha256>" reference that is resolved when the image is displayed
+"""
+
+import io
+import os
+import re
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+REFERENCE_PREFIX = "imgref:"
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".snapmenu", "blobs")
+DEFAULT_WEBP_QUALITY = 80
+BLOB_MEMO_SIZE = 128
+WEBP_MIME_TYPE = "image/webp"
+
+# SVG placeholders are tiny and not raster images, so they stay inline
+RASTER_DATA_URL_PATTERN = re.compile(r'^data:image/(png|jpeg|jpg|webp|gif);base64,(.*)$', re.DOTALL)
+REFERENCE_PATTERN = re.compile(r'^imgref:([0-9a-f]{64})$')
+
+def is_image_reference(value):
+    return isinstance(value, str) and bool(REFERENCE_PATTERN.match(value))
+
+def encode_webp(image_bytes):
+    """Re-encode any raster image to WebP"""
+    quality = int(os.getenv('IMAGE_WEBP_QUALITY', DEFAULT_WEBP_QUALITY))
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        output = io.BytesIO()
+        image.save(output, format="WEBP", quality=quality, method=4)
+    return output.getvalue()
+
+class FileImageStore:
+    """Blobs at <root>/<hash[:2]>/<hash>.webp"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, content_hash):
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.webp")
+
+    def put(self, content_hash, data):
+        path = self._path(content_hash)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, content_hash):
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def exists(self, content_hash):
+        return os.path.exists(self._path(content_hash))
+
+class PostgresImageStore:
+    """Blobs in the image_blobs bytea table, with a small read-through memo"""
+
+    def __init__(self):
+        self._memo = OrderedDict()  # content_hash -> bytes; misses and failures are never memoized
+        self._lock = threading.Lock()
+
+    def put(self, content_hash, data):
+        from database import store_image_blob
+        if not store_image_blob(content_hash, WEBP_MIME_TYPE, data):
+            raise RuntimeError("image_blobs insert failed")
+
+    def get(self, content_hash):
+        with self._lock:
+            if content_hash in self._memo:
+                self._memo.move_to_end(content_hash)
+                return self._memo[content_hash]
+
+        from database import get_image_blob
+        data = get_image_blob(content_hash)
+        if data is not None:
+            with self._lock:
+                self._memo[content_hash] = data
+                while len(self._memo) > BLOB_MEMO_SIZE:
+                    self._memo.popitem(last=False)
+        return data
+
+    def exists(self, content_hash):
+        return self.get(content_hash) is not None
+
+# Global store instance
+_image_store = None
+
+def get_image_store():
+    global _image_store
+    if _image_store is None:
+        backend = os.getenv('IMAGE_STORE_BACKEND', 'file').lower()
+        if backend == 'postgres':
+            _image_store = PostgresImageStore()
+        else:
+            _image_store = FileImageStore(os.path.expanduser(os.getenv('IMAGE_STORE_DIR', DEFAULT_STORE_DIR)))
+    return _image_store
+
+def store_image_data_url(image_url):
+    """Move a raster data URL into the image store and return its reference.
+
+    Anything else (remote URLs, SVG placeholders, existing references) is
+    returned unchanged, as is the original data URL if storing fails.
+    """
+    if not isinstance(image_url, str):
+        return image_url
+    match = RASTER_DATA_URL_PATTERN.match(image_url)
+    if not match:
+        return image_url
+
+    try:
+        webp_bytes = encode_webp(base64.b64decode(match.group(2)))
+        content_hash = hashlib.sha256(webp_bytes).hexdigest()
+        get_image_store().put(content_hash, webp_bytes)
+        print(f"🗄️  Stored image {content_hash[:12]} ({len(image_url) // 1024}KB data URL -> {len(webp_bytes) // 1024}KB WebP)")
+        return f"{REFERENCE_PREFIX}{content_hash}"
+
+    except Exception as e:
+        print(f"⚠️  Image store failed, keeping data URL: {str(e)}")
+        return image_url
+
+def load_image_bytes(reference):
+    """Return the stored bytes for a reference, or None if it is unknown"""
+    match = REFERENCE_PATTERN.match(reference)
+    if not match:
+        return None
+    try:
+        return get_image_store().get(match.group(1))
+    except Exception as e:
+        print(f"⚠️  Failed to load image {reference}: {str(e)}")
+        return None
+
+def image_available(image_url):
+    """False if image_url is a reference whose blob is not in this process's store"""
+    match = REFERENCE_PATTERN.match(image_url) if isinstance(image_url, str) else None
+    if not match:
+        return bool(image_url)
+    try:
+        return get_image_store().exists(match.group(1))
+    except Exception as e:
+        print(f"⚠️  Failed to check image {image_url}: {str(e)}")
+        return False
+
+def resolve_image(image_url):
+    """Turn a stored dish image into something st.image can display"""
+    if is_image_reference(image_url):
+        image_bytes = load_image_bytes(image_url)
+        if image_bytes is None:
+            from image_generation import get_placeholder_image_url
+            return get_placeholder_image_url()
+        return image_bytes
+    return image_url
@@ -0,0 +1,137 @@
+"""
+Lazy image generation for dishes below the fold
+The pipeline only illustrates the first LAZY_VISIBLE_IMAGES dishes; the rest
+are queued here in display priority and generated on the background loop,
+each image written to processed_dishes and the image cache as it lands
+"""
+
+import os
+import asyncio
+import weakref
+import itertools
+from image_generation import generate_dish_image
+from database import update_dish_image_async, update_processing_status_async
+from menu_result_cache import remember_menu, forget_menu
+
+LAZY_IMAGE_TIMEOUT = 30  # Nobody is waiting, so give FLUX longer than the interactive path
+
+def lazy_images_enabled():
+    return os.getenv('LAZY_IMAGES', 'true').lower() == 'true'
+
+def get_visible_image_count():
+    """Images generated before the menu is returned"""
+    return int(os.getenv('LAZY_VISIBLE_IMAGES', 6))
+
+class LazyMenu:
+    """Deferred image jobs of one stored menu; when the last one finishes the upload is promoted
+    to 'completed' and cached, or left 'partial' and uncached if any image could not be generated"""
+
+    def __init__(self, dishes, upload_id, image_hash, language, pending):
+        self.dishes = dishes
+        self.upload_id = upload_id
+        self.image_hash = image_hash  # None when the run was incomplete and must not be cached
+        self.language = language
+        self.remaining = pending
+        self.failed = 0
+        self.settled = asyncio.Event()  # Set once every job has finished
+
+    async def job_done(self, succeeded):
+        self.remaining -= 1
+        self.failed += not succeeded
+        if self.remaining > 0:
+            return
+        
+        print(f"🖼️  Lazy images finished for upload {self.upload_id} ({self.failed} failed)")
+        self.settled.set()
+        if not self.image_hash:
+            return
+        if _in_flight.get((self.image_hash, self.language)) is self:
+            del _in_flight[(self.image_hash, self.language)]
+        if self.failed:
+            forget_menu(self.image_hash, self.language)
+            if self.upload_id:
+                await update_processing_status_async(self.upload_id, 'partial')
+        else:
+            # The upload was stored 'partial' while images were pending
+            if self.upload_id:
+                await update_processing_status_async(self.upload_id, 'completed')
+            remember_menu(self.image_hash, self.language, self.dishes)
+
+class LazyImageWorker:
+    """PriorityQueue of dish image jobs drained by a few workers on one event loop"""
+
+    def __init__(self, concurrency):
+        self.queue = asyncio.PriorityQueue()
+        self._order = itertools.count()  # FIFO among equal priorities; jobs themselves are not comparable
+        self.workers = [asyncio.ensure_future(self._work()) for _ in range(concurrency)]
+
+    def submit(self, priority, job):
+        self.queue.put_nowait((priority, next(self._order), job))
+
+    async def _work(self):
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Lazy image job failed: {type(e).__name__}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+# Workers are bound to the event loop they were created on
+_workers = weakref.WeakKeyDictionary()
+
+# Cacheable menus whose lazy images are still being generated, by (image_hash, language)
+_in_flight = {}
+
+def get_lazy_menu(image_hash, language):
+    """LazyMenu of a stored menu whose images are still being generated, or None"""
+    return _in_flight.get((image_hash, language))
+
+def get_lazy_image_worker():
+    loop = asyncio.get_running_loop()
+    if loop not in _workers:
+        _workers[loop] = LazyImageWorker(int(os.getenv('LAZY_IMAGE_WORKERS', 2)))
+    return _workers[loop]
+
+def display_priorities(dishes):
+    """(category rank, position) per dish, matching the grid: categories in order of first appearance"""
+    category_ranks = {}
+    priorities = []
+    for position, dish in enumerate(dishes):
+        rank = category_ranks.setdefault(dish.get('category', 'Other'), len(category_ranks))
+        priorities.append((rank, position))
+    return priorities
+
+def schedule_lazy_images(dishes, upload_id, image_hash, language, style_prompt=""):
+    """Queue every dish still marked image_pending; must be called on the background loop.
+
+    `dishes` must be in display order (processed_dishes.display_order is the index).
+    """
+    pending = [(priority, index) for index, priority in enumerate(display_priorities(dishes))
+               if dishes[index].get('image_pending')]
+    if not pending:
+        return 0
+
+    menu = LazyMenu(dishes, upload_id, image_hash, language, len(pending))
+    if image_hash:
+        _in_flight[(image_hash, language)] = menu
+    worker = get_lazy_image_worker()
+
+    for priority, index in pending:
+        async def job(dish=dishes[index], display_order=index):
+            succeeded = False
+            try:
+                succeeded = await generate_dish_image(dish, style_prompt, timeout=LAZY_IMAGE_TIMEOUT)
+                if dish.get('generated_image_url') and upload_id:
+                    await update_dish_image_async(upload_id, display_order, dish['generated_image_url'])
+            finally:
+                dish.pop('image_pending', None)
+                await menu.job_done(succeeded)
+
+        worker.submit(priority, job)
+
+    print(f"🕒 Queued {len(pending)} lazy images for upload {upload_id}")
+    return len(pending)
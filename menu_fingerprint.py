@@ -0,0 +1,137 @@
+"""
+Perceptual-hash near-duplicate menu detection
+Re-photographed menus reuse prior OCR text and parsed dishes instead of calling Pixtral
+"""
+
+import io
+import os
+import copy
+import time
+import threading
+from PIL import Image, ImageOps
+
+DEFAULT_HAMMING_THRESHOLD = 8
+HASH_SIZE = 8  # 8x8 gradient bits -> 64-bit hash
+LOAD_RETRY_COOLDOWN = 30  # Seconds before retrying a failed index load
+
+def compute_dhash(image_bytes, hash_size=HASH_SIZE):
+    """Compute a difference hash (dHash) of the image, or None if it cannot be decoded"""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img = ImageOps.exif_transpose(img)
+            small = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    except Exception as e:
+        print(f"⚠️  Could not compute menu fingerprint: {str(e)}")
+        return None
+
+    pixels = list(small.getdata())
+    dhash = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            dhash = (dhash << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return dhash
+
+def hamming_distance(hash_a, hash_b):
+    """Number of differing bits between two hashes"""
+    return bin(hash_a ^ hash_b).count('1')
+
+def _to_signed64(value):
+    """Postgres BIGINT is signed; fold the unsigned 64-bit hash into range"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def _to_unsigned64(value):
+    return value + (1 << 64) if value < 0 else value
+
+class FingerprintIndex:
+    """In-memory index of menu fingerprints loaded lazily from Postgres"""
+
+    def __init__(self):
+        self.entries = []  # (fingerprint_id, dhash)
+        self.loaded = False
+        self.failed_at = None  # Monotonic time of the last failed load
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self.loaded:
+            return
+        if self.failed_at is not None and time.monotonic() - self.failed_at < LOAD_RETRY_COOLDOWN:
+            return  # Database was unavailable moments ago; search what this process added meanwhile
+        from database import load_menu_fingerprints
+        rows = load_menu_fingerprints()
+        if rows is None:
+            self.failed_at = time.monotonic()
+            print(f"⚠️  Menu fingerprints unavailable, retrying in {LOAD_RETRY_COOLDOWN}s")
+            return
+        # Entries add()ed before the load are stored rows too, so the query covers them
+        self.entries = [(row['id'], _to_unsigned64(row['dhash'])) for row in rows]
+        self.loaded = True
+
+    def nearest(self, dhash):
+        """Return (fingerprint_id, distance) of the closest stored menu, or None"""
+        with self._lock:
+            self._ensure_loaded()
+            best = None
+            for fingerprint_id, stored_hash in self.entries:
+                distance = hamming_distance(dhash, stored_hash)
+                if best is None or distance < best[1]:
+                    best = (fingerprint_id, distance)
+            return best
+
+    def add(self, fingerprint_id, dhash):
+        with self._lock:
+            self.entries.append((fingerprint_id, dhash))
+
+# Global index instance
+_fingerprint_index = None
+
+def get_fingerprint_index():
+    global _fingerprint_index
+    if _fingerprint_index is None:
+        _fingerprint_index = FingerprintIndex()
+    return _fingerprint_index
+
+def find_near_duplicate_menu(image_bytes):
+    """Return prior OCR text and dishes for a near-identical menu photo, or None"""
+    try:
+        dhash = compute_dhash(image_bytes)
+        if dhash is None:
+            return None
+
+        threshold = int(os.getenv('MENU_DHASH_THRESHOLD', DEFAULT_HAMMING_THRESHOLD))
+        nearest = get_fingerprint_index().nearest(dhash)
+        if not nearest or nearest[1] > threshold:
+            return None
+
+        from database import get_menu_fingerprint
+        match = get_menu_fingerprint(nearest[0])
+        if not match or not match.get('dishes'):
+            return None
+
+        print(f"⚡ Near-duplicate menu found (distance {nearest[1]}), skipping OCR")
+        return {
+            'ocr_text': match['ocr_text'],
+            'dishes': copy.deepcopy(match['dishes'])
+        }
+
+    except Exception as e:
+        print(f"⚠️  Near-duplicate lookup failed: {str(e)}")
+        return None
+
+def record_menu_fingerprint(upload_id, image_bytes, ocr_text, dishes):
+    """Index a processed menu so later re-photographs can reuse its results"""
+    try:
+        if not dishes:
+            return
+
+        dhash = compute_dhash(image_bytes)
+        if dhash is None:
+            return
+
+        from database import store_menu_fingerprint
+        fingerprint_id = store_menu_fingerprint(upload_id, _to_signed64(dhash), ocr_text, dishes)
+        if fingerprint_id:
+            get_fingerprint_index().add(fingerprint_id, dhash)
+
+    except Exception as e:
+        print(f"⚠️  Failed to record menu fingerprint: {str(e)}")
@@ -3,7 +3,9 @@ Consolidated menu intelligence combining translation, enhancement, and omakase
 Replaces translation_service.py and pixtral_service.py (300 lines -> 80 lines)
 """
 
+import asyncio
 from pixtral_client import get_pixtral_client, retry_on_timeout
+from translation_memory import apply_translation_memory, remember_dish_translations
 
 SUPPORTED_LANGUAGES = {
     "en": "English", "zh": "Mandarin Chinese", "es": "Spanish", 
@@ -13,7 +15,11 @@ SUPPORTED_LANGUAGES = {
 
 @retry_on_timeout(max_attempts=2)
 async def translate_dishes(dishes, target_language):
-    """Translate dishes using unified Pixtral client"""
+    """Translate dishes using unified Pixtral client
+
+    Dishes that could not be translated keep their original text and are
+    marked with 'translation_failed'.
+    """
     if target_language == "en":
         for dish in dishes:
             dish['name_translated'] = dish.get('name_original', '')
@@ -22,9 +28,14 @@ async def translate_dishes(dishes, target_language):
     
     target_lang_name = SUPPORTED_LANGUAGES.get(target_language, "English")
     
+    # Only dishes missing from translation memory are sent to Pixtral
+    pending = await asyncio.to_thread(apply_translation_memory, dishes, target_language)
+    if not pending:
+        return dishes
+    
     # Prepare batch translation request
     menu_items = []
-    for i, dish in enumerate(dishes):
+    for i, dish in enumerate(pending):
         name = dish.get('name_original', '')
         desc = dish.get('description_original', '')
         menu_items.append(f"{i+1}. {name} - {desc}")
@@ -37,17 +48,25 @@ Keep format: "Number. Dish Name - Description\""""
     try:
         client = get_pixtral_client()
         result = await client.text_completion(prompt, max_tokens=2000, temperature=0.3)
-        return parse_translations(dishes, result)
+        translated = []
+        parse_translations(pending, result, translated)
+        await asyncio.to_thread(remember_dish_translations, translated, target_language)
+        translated_ids = {id(dish) for dish in translated}
+        for dish in pending:
+            if id(dish) not in translated_ids:
+                dish['translation_failed'] = True
+        return dishes
     except Exception as e:
         print(f"❌ Translation failed: {e}")
         # Fallback to original text
-        for dish in dishes:
+        for dish in pending:
             dish['name_translated'] = dish.get('name_original', '')
             dish['description_translated'] = dish.get('description_original', '')
+            dish['translation_failed'] = True
         return dishes
 
-def parse_translations(original_dishes, translated_text):
-    """Parse translation results back to dishes"""
+def parse_translations(original_dishes, translated_text, translated=None):
+    """Parse translation results back to dishes, collecting successes in `translated`"""
     if not translated_text:
         return original_dishes
     
@@ -66,6 +85,8 @@ def parse_translations(original_dishes, translated_text):
                     else:
                         dish['name_translated'] = content.strip()
                         dish['description_translated'] = dish.get('description_original', '')
+                    if translated is not None:
+                        translated.append(dish)
                     break
                 except:
                     pass
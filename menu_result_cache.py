@@ -0,0 +1,96 @@
+"""
+Processed-menu result cache
+Known menus skip the whole pipeline: the final dish list is keyed by
+(image hash, target language, pipeline version), kept in an in-memory LRU
+and backed by menu_uploads/processed_dishes
+"""
+
+import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from image_store import image_available
+
+# Bump whenever OCR prompts, parsing or stage behaviour change the produced dishes
+PIPELINE_VERSION = "2026.10.1"
+DEFAULT_MAX_ENTRIES = 64
+
+def compute_menu_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def images_available(dishes):
+    """False if any dish image is a reference whose blob is not in this process's image store"""
+    return all(image_available(dish['generated_image_url']) for dish in dishes if dish.get('generated_image_url'))
+
+class MenuResultCache:
+    """Thread-safe LRU of finished dish lists, falling back to Postgres on a miss"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (image_hash, language, version) -> dishes
+        self._lock = threading.Lock()
+
+    def _remember(self, key, dishes):
+        dishes = copy.deepcopy(dishes)
+        for dish in dishes:
+            dish.pop('image_pending', None)  # Only the session that queued the lazy image will see it land
+        with self._lock:
+            self._entries[key] = dishes
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, image_hash, language):
+        """Return a fresh copy of the cached dishes (callers mutate them), or None"""
+        key = (image_hash, language, PIPELINE_VERSION)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return copy.deepcopy(self._entries[key])
+
+        from database import get_processed_menu
+        dishes = get_processed_menu(image_hash, language, PIPELINE_VERSION)
+        if dishes and not images_available(dishes):
+            # Stored by another instance or before a redeploy; its file-store images are not here
+            print("⚠️  Stored menu references images missing from this image store - treating as a miss")
+            return None
+        if dishes:
+            self._remember(key, dishes)
+        return dishes
+
+    def put(self, image_hash, language, dishes):
+        self._remember((image_hash, language, PIPELINE_VERSION), dishes)
+
+    def discard(self, image_hash, language):
+        with self._lock:
+            self._entries.pop((image_hash, language, PIPELINE_VERSION), None)
+
+# Global cache instance
+_menu_result_cache = None
+
+def get_menu_result_cache():
+    global _menu_result_cache
+    if _menu_result_cache is None:
+        _menu_result_cache = MenuResultCache(int(os.getenv('MENU_RESULT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)))
+    return _menu_result_cache
+
+def get_cached_menu(image_hash, language):
+    """Return the finished dishes for a known menu, or None; failures count as misses"""
+    if os.getenv('MENU_RESULT_CACHE', 'true').lower() != 'true':
+        return None
+    try:
+        return get_menu_result_cache().get(image_hash, language)
+    except Exception as e:
+        print(f"⚠️  Menu result cache lookup failed: {str(e)}")
+        return None
+
+def remember_menu(image_hash, language, dishes):
+    """Keep a finished menu in memory; the database copy is written with processed_dishes"""
+    if not dishes or os.getenv('MENU_RESULT_CACHE', 'true').lower() != 'true':
+        return
+    get_menu_result_cache().put(image_hash, language, dishes)
+
+def forget_menu(image_hash, language):
+    """Drop a menu that turned out to be incomplete from memory (its upload must not stay 'completed')"""
+    get_menu_result_cache().discard(image_hash, language)
@@ -0,0 +1,163 @@
+"""
+Content-addressed OCR result cache
+Repeat uploads of the same menu photo skip the Pixtral vision call entirely
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".snapmenu", "ocr_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # One week
+DEFAULT_MAX_ENTRIES = 1000
+
+def compute_ocr_cache_key(image_bytes, prompt_version):
+    """Hash image bytes together with the prompt version"""
+    digest = hashlib.sha256()
+    digest.update(prompt_version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+class SQLiteOCRCache:
+    """Local disk backend with TTL and LRU eviction"""
+
+    def __init__(self, path, ttl_seconds, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    ocr_text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_accessed ON ocr_cache (last_accessed)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, cache_key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT ocr_text, created_at FROM ocr_cache WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+
+            if not row:
+                return None
+
+            ocr_text, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM ocr_cache WHERE cache_key = ?", (cache_key,))
+                return None
+
+            conn.execute(
+                "UPDATE ocr_cache SET last_accessed = ? WHERE cache_key = ?",
+                (now, cache_key)
+            )
+            return ocr_text
+
+    def set(self, cache_key, ocr_text):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO ocr_cache (cache_key, ocr_text, created_at, last_accessed)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    ocr_text = excluded.ocr_text,
+                    created_at = excluded.created_at,
+                    last_accessed = excluded.last_accessed
+            """, (cache_key, ocr_text, now, now))
+
+            # Drop expired entries, then trim least recently used beyond the size bound
+            conn.execute("DELETE FROM ocr_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute("""
+                DELETE FROM ocr_cache WHERE cache_key IN (
+                    SELECT cache_key FROM ocr_cache
+                    ORDER BY last_accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+class PostgresOCRCache:
+    """Postgres backend stored next to menu uploads"""
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def get(self, cache_key):
+        from database import get_cached_ocr_result
+        return get_cached_ocr_result(cache_key, self.ttl_seconds)
+
+    def set(self, cache_key, ocr_text):
+        from database import store_ocr_result
+        store_ocr_result(cache_key, ocr_text, self.ttl_seconds, self.max_entries)
+
+# Global cache instance
+_ocr_cache = None
+
+def get_ocr_cache():
+    """Return the configured cache backend, or None when caching is disabled"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        backend = os.getenv('OCR_CACHE_BACKEND', 'sqlite').lower()
+        ttl_seconds = int(os.getenv('OCR_CACHE_TTL', DEFAULT_TTL_SECONDS))
+        max_entries = int(os.getenv('OCR_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+
+        if backend == 'none':
+            return None
+        elif backend == 'postgres':
+            _ocr_cache = PostgresOCRCache(ttl_seconds, max_entries)
+        else:
+            path = os.path.expanduser(os.getenv('OCR_CACHE_PATH', DEFAULT_CACHE_PATH))
+            _ocr_cache = SQLiteOCRCache(path, ttl_seconds, max_entries)
+    return _ocr_cache
+
+def get_cached_ocr(image_bytes, prompt_version):
+    """Look up OCR text for an image, returning None on miss or cache failure"""
+    try:
+        cache = get_ocr_cache()
+        if cache is None:
+            return None
+
+        ocr_text = cache.get(compute_ocr_cache_key(image_bytes, prompt_version))
+        if ocr_text:
+            print(f"⚡ OCR cache hit ({len(ocr_text)} chars)")
+        return ocr_text
+
+    except Exception as e:
+        print(f"⚠️  OCR cache lookup failed: {str(e)}")
+        return None
+
+def store_cached_ocr(image_bytes, prompt_version, ocr_text):
+    """Store OCR text for an image; cache failures never break OCR"""
+    try:
+        cache = get_ocr_cache()
+        if cache is None or not ocr_text:
+            return
+
+        cache.set(compute_ocr_cache_key(image_bytes, prompt_version), ocr_text)
+
+    except Exception as e:
+        print(f"⚠️  OCR cache store failed: {str(e)}")
@@ -2,12 +2,62 @@ import os
 import base64
 import asyncio
 import time
-from openai import AsyncOpenAI
+from http_pool import get_openai_client
+from ocr_cache import get_cached_ocr, store_cached_ocr
+from image_preprocessing import preprocess_menu_image
+from ocr_tiling import tiled_menu_ocr
+from pixtral_client import get_pixtral_client
+from utils import IncrementalMenuParser, parse_menu_structure, categorize_dishes
 
-async def process_menu_ocr(image_file):
-    """Process menu image using Pixtral 12B vision model via OpenAI SDK"""
+# Bump whenever the OCR prompt changes so cached results are not reused
+OCR_PROMPT_VERSION = "ocr-v1"
+
+OCR_STREAM_IDLE_TIMEOUT = 15.0  # Max wait between streamed tokens
+OCR_STREAM_TIMEOUT = 45.0  # Max for the whole stream, however steadily tokens arrive
+
+OCR_PROMPT = """Analyze this restaurant menu image and extract all text content. 
+
+Please provide:
+1. All dish names exactly as written
+2. Complete descriptions for each dish
+3. All prices with currency symbols
+4. Category headers (appetizers, mains, desserts, etc.)
+
+Maintain the original structure and formatting. Output the text in a clear, organized format that preserves the menu's hierarchy."""
+
+async def process_menu_ocr(image_file, mode=None):
+    """Process menu image using Pixtral 12B vision model via OpenAI SDK
+
+    mode is "single" (one vision request) or "tiled" (concurrent overlapping
+    tiles for large multi-column menus); defaults to the OCR_MODE env var.
+    """
     start_time = time.time()
     max_retries = 2
+    mode = (mode or os.getenv('OCR_MODE', 'single')).lower()
+    prompt_version = f"{OCR_PROMPT_VERSION}:{mode}"
+    
+    # Serve repeat uploads of the same image from the OCR cache
+    image_bytes = image_file.read()
+    image_file.seek(0)
+    
+    cached_text = await asyncio.to_thread(get_cached_ocr, image_bytes, prompt_version)
+    if cached_text:
+        return cached_text
+    
+    if mode == "tiled":
+        try:
+            result_content = await tiled_menu_ocr(image_bytes, OCR_PROMPT)
+            await asyncio.to_thread(store_cached_ocr, image_bytes, prompt_version, result_content)
+            return result_content
+        except Exception as e:
+            print(f"❌ Tiled OCR failed ({type(e).__name__}: {str(e)}), falling back to single request")
+            prompt_version = f"{OCR_PROMPT_VERSION}:single"
+    
+    # Shrink the payload once, off the event loop, before any attempt
+    preprocessed = await asyncio.to_thread(preprocess_menu_image, image_bytes)
+    image_size_mb = preprocessed['processed_size'] / (1024 * 1024)
+    image_base64 = base64.b64encode(preprocessed['image_bytes']).decode('utf-8')
+    mime_type = preprocessed['mime_type']
     
     for attempt in range(max_retries + 1):
         try:
@@ -15,16 +65,8 @@ async def process_menu_ocr(image_file):
                 print(f"🔄 OCR Retry attempt {attempt}/{max_retries}")
                 await asyncio.sleep(1)  # Brief delay between retries
             
-            # Get image info for debugging
-            image_bytes = image_file.read()
-            image_size_mb = len(image_bytes) / (1024 * 1024)
-            image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-            
             print(f"🔍 OCR Debug: Attempt {attempt + 1}, Image size {image_size_mb:.2f}MB, base64 length {len(image_base64)}")
             
-            # Reset file pointer for potential reuse
-            image_file.seek(0)
-            
             # Initialize OpenAI client with Pixtral endpoint
             base_endpoint = os.getenv('PIXTRAL_ENDPOINT')
             api_key = os.getenv('OPENAI_API_KEY')
@@ -34,9 +76,9 @@ async def process_menu_ocr(image_file):
             
             print(f"🔍 OCR Debug: Connecting to {base_endpoint}/v1")
             
-            client = AsyncOpenAI(
-                api_key=api_key,
-                base_url=f"{base_endpoint.rstrip('/')}/v1",
+            client = get_openai_client(
+                f"{base_endpoint.rstrip('/')}/v1",
+                api_key,
                 timeout=30.0  # Increased SDK-level timeout
             )
             
@@ -56,20 +98,12 @@ async def process_menu_ocr(image_file):
                             "content": [
                                 {
                                     "type": "text",
-                                    "text": """Analyze this restaurant menu image and extract all text content. 
-
-Please provide:
-1. All dish names exactly as written
-2. Complete descriptions for each dish
-3. All prices with currency symbols
-4. Category headers (appetizers, mains, desserts, etc.)
-
-Maintain the original structure and formatting. Output the text in a clear, organized format that preserves the menu's hierarchy."""
+                                    "text": OCR_PROMPT
                                 },
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/jpeg;base64,{image_base64}"
+                                        "url": f"data:{mime_type};base64,{image_base64}"
                                     }
                                 }
                             ]
@@ -89,6 +123,7 @@ Maintain the original structure and formatting. Output the text in a clear, orga
             result_content = response.choices[0].message.content
             print(f"🔍 OCR Debug: Response length {len(result_content)} characters")
             
+            await asyncio.to_thread(store_cached_ocr, image_bytes, prompt_version, result_content)
             return result_content
             
         except asyncio.TimeoutError as e:
@@ -130,6 +165,88 @@ Maintain the original structure and formatting. Output the text in a clear, orga
     print("🚨 Unexpected: Retry loop completed without return")
     return fallback_text_extraction(image_file)
 
+async def stream_menu_ocr(image_file, transcript=None):
+    """Stream OCR tokens from Pixtral and yield categorized dishes as each menu line completes
+
+    If transcript is a dict it receives the full OCR 'text' and 'complete',
+    which is False when the text is partial or the placeholder fallback.
+    The stream is cut after OCR_STREAM_IDLE_TIMEOUT without a token or
+    OCR_STREAM_TIMEOUT overall, and always closed on the way out.
+    """
+    transcript = transcript if transcript is not None else {}
+    mode = os.getenv('OCR_MODE', 'single').lower()
+    prompt_version = f"{OCR_PROMPT_VERSION}:single"
+    
+    image_bytes = image_file.read()
+    image_file.seek(0)
+    
+    cached_text = await asyncio.to_thread(get_cached_ocr, image_bytes, prompt_version) if mode != "tiled" else None
+    if mode == "tiled" or cached_text:
+        # Nothing to stream: tiled OCR completes as a whole, cache hits are instant
+        menu_text = cached_text or await process_menu_ocr(image_file, mode)
+        transcript.update(text=menu_text, complete=not is_fallback_text(menu_text))
+        for dish in categorize_dishes(parse_menu_structure(menu_text)):
+            yield dish
+        return
+    
+    start_time = time.time()
+    preprocessed = await asyncio.to_thread(preprocess_menu_image, image_bytes)
+    image_base64 = base64.b64encode(preprocessed['image_bytes']).decode('utf-8')
+    
+    parser = IncrementalMenuParser()
+    chunks = []
+    emitted = 0
+    deadline = start_time + OCR_STREAM_TIMEOUT
+    tokens = None
+    
+    try:
+        client = get_pixtral_client()
+        tokens = client.vision_completion_stream(OCR_PROMPT, image_base64, mime_type=preprocessed['mime_type'])
+        
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"OCR stream still running after {OCR_STREAM_TIMEOUT}s")
+            try:
+                delta = await asyncio.wait_for(tokens.__anext__(), timeout=min(OCR_STREAM_IDLE_TIMEOUT, remaining))
+            except StopAsyncIteration:
+                break
+            
+            chunks.append(delta)
+            for dish in categorize_dishes(parser.feed(delta)):
+                emitted += 1
+                if emitted == 1:
+                    print(f"⚡ OCR stream: first dish after {time.time() - start_time:.2f}s")
+                yield dish
+        
+        for dish in categorize_dishes(parser.close()):
+            emitted += 1
+            yield dish
+            
+    except Exception as e:
+        print(f"❌ OCR stream failed ({type(e).__name__}: {str(e)}) after {emitted} dishes")
+        if tokens is not None:
+            await tokens.aclose()  # Drop the connection before the fallback opens another
+        
+        if emitted == 0:
+            # Nothing shown yet, so the retrying non-streaming path can take over
+            menu_text = await process_menu_ocr(image_file, "single")
+            transcript.update(text=menu_text, complete=not is_fallback_text(menu_text))
+            for dish in categorize_dishes(parse_menu_structure(menu_text)):
+                yield dish
+        else:
+            transcript.update(text="".join(chunks), complete=False)
+        return
+    finally:
+        # Also runs when the consumer stops iterating or the pipeline is cancelled
+        if tokens is not None:
+            await tokens.aclose()
+    
+    menu_text = "".join(chunks)
+    print(f"✅ OCR stream: {emitted} dishes, {len(menu_text)} chars in {time.time() - start_time:.2f}s")
+    await asyncio.to_thread(store_cached_ocr, image_bytes, prompt_version, menu_text)
+    transcript.update(text=menu_text, complete=True)
+
 def fallback_text_extraction(image_file):
     """Fallback OCR using local processing if available"""
     # This would use a local OCR library like pytesseract if needed
@@ -147,4 +264,8 @@ def fallback_text_extraction(image_file):
     DESSERTS
     Chocolate Cake - Rich chocolate with berries - $9.95
     Ice Cream - Vanilla, chocolate, or strawberry - $6.50
-    """
\ No newline at end of file
+    """
+
+def is_fallback_text(menu_text):
+    """True if the text is the placeholder menu rather than real OCR output"""
+    return menu_text == fallback_text_extraction(None)
@@ -3,18 +3,41 @@ Simplified OCR service using unified Pixtral client
 Reduces from 150 lines to ~40 lines
 """
 
+import os
 import base64
+import asyncio
 from pixtral_client import get_pixtral_client, retry_on_timeout
+from ocr_cache import get_cached_ocr, store_cached_ocr
+from image_preprocessing import preprocess_menu_image
+from ocr_tiling import tiled_menu_ocr
 
-@retry_on_timeout(max_attempts=2, timeout=15.0)
-async def process_menu_ocr(image_file):
-    """Process menu image using simplified Pixtral integration"""
+# Bump whenever the OCR prompt changes so cached results are not reused
+OCR_PROMPT_VERSION = "ocr-simplified-v1"
+TILED_OCR_TIMEOUT = 45.0  # Whole tiled run: tiles go in waves, each bounded by ocr_tiling.TILE_TIMEOUT
+
+async def process_menu_ocr(image_file, mode=None):
+    """Process menu image using simplified Pixtral integration ("single" or "tiled" mode)
+
+    Single-shot OCR gets two 15s attempts. Tiled OCR gets one overall
+    budget instead: retrying would redo every tile, and a 15s cap would
+    cut off a run whose tiles each have TILE_TIMEOUT.
+    """
+    mode = (mode or os.getenv('OCR_MODE', 'single')).lower()
+    if mode == "tiled":
+        return await tiled_ocr_with_budget(image_file, mode)
+    return await single_ocr_with_retry(image_file, mode)
+
+async def run_menu_ocr(image_file, mode):
+    """One OCR run in the given mode, served from the OCR cache when possible"""
+    prompt_version = f"{OCR_PROMPT_VERSION}:{mode}"
     
-    # Convert image to base64
     image_bytes = image_file.read()
-    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
     image_file.seek(0)  # Reset for potential reuse
     
+    cached_text = await asyncio.to_thread(get_cached_ocr, image_bytes, prompt_version)
+    if cached_text:
+        return cached_text
+    
     prompt = """Analyze this restaurant menu image and extract all text content. 
 
 Please provide:
@@ -26,15 +49,26 @@ Please provide:
 Maintain the original structure and formatting."""
 
     try:
-        client = get_pixtral_client()
-        result = await client.vision_completion(prompt, image_base64)
+        if mode == "tiled":
+            result = await tiled_menu_ocr(image_bytes, prompt)
+        else:
+            # Shrink and convert image to base64
+            preprocessed = await asyncio.to_thread(preprocess_menu_image, image_bytes)
+            image_base64 = base64.b64encode(preprocessed['image_bytes']).decode('utf-8')
+            
+            client = get_pixtral_client()
+            result = await client.vision_completion(prompt, image_base64, mime_type=preprocessed['mime_type'])
         print(f"✅ OCR completed successfully ({len(result)} chars)")
+        await asyncio.to_thread(store_cached_ocr, image_bytes, prompt_version, result)
         return result
         
     except Exception as e:
         print(f"❌ OCR failed: {str(e)}, using fallback")
         return get_fallback_menu()
 
+single_ocr_with_retry = retry_on_timeout(max_attempts=2, timeout=15.0)(run_menu_ocr)
+tiled_ocr_with_budget = retry_on_timeout(max_attempts=1, timeout=TILED_OCR_TIMEOUT)(run_menu_ocr)
+
 def get_fallback_menu():
     """Simplified fallback menu"""
     return """
@@ -50,4 +84,8 @@ def get_fallback_menu():
     DESSERTS
     Chocolate Cake - Rich chocolate with berries - $9.95
     Ice Cream - Vanilla, chocolate, or strawberry - $6.50
-    """
\ No newline at end of file
+    """
+
+def is_fallback_text(menu_text):
+    """True if the text is the placeholder menu rather than real OCR output"""
+    return menu_text == get_fallback_menu()
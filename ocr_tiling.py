@@ -0,0 +1,175 @@
+"""
+Tiled/parallel OCR for large multi-column menus
+Splits the menu into overlapping tiles along detected columns, OCRs them
+concurrently through PixtralClient and stitches the text back together
+"""
+
+import io
+import os
+import re
+import math
+import base64
+import asyncio
+import time
+from PIL import Image, ImageOps
+from pixtral_client import get_pixtral_client
+from image_preprocessing import normalise_image, encode_image, get_output_mime_type
+
+DEFAULT_TILE_CONCURRENCY = 4
+DEFAULT_MAX_TILES = 8
+TILED_MAX_LONG_EDGE = 3072  # Keep more detail than single-shot OCR since each tile is small
+TILE_MAX_HEIGHT = 1100
+TILE_OVERLAP_RATIO = 0.12
+TILE_TIMEOUT = 25.0
+MAX_COLUMNS = 4
+MIN_GUTTER_RATIO = 0.02  # Blank vertical strip, as a fraction of width, that separates columns
+DEDUPE_WINDOW = 8  # Lines compared on each side of a tile overlap
+
+def detect_columns(img, max_columns=MAX_COLUMNS):
+    """Return [(left, right)] pixel ranges of text columns separated by blank gutters"""
+    width, height = img.size
+    profile_width = min(400, width)
+
+    # Binarise ink, then average each pixel column down to a single row
+    ink = ImageOps.autocontrast(img.convert('L')).point(lambda p: 255 if p < 128 else 0)
+    small_height = max(1, int(height * profile_width / width))
+    profile = list(
+        ink.resize((profile_width, small_height), Image.Resampling.BOX)
+           .resize((profile_width, 1), Image.Resampling.BOX)
+           .getdata()
+    )
+
+    # Columns with almost no ink are gutter candidates
+    blank = [value < 3 for value in profile]
+    min_gutter = max(2, int(profile_width * MIN_GUTTER_RATIO))
+
+    cuts = []
+    run_start = None
+    for x, is_blank in enumerate(blank + [False]):
+        if is_blank and run_start is None:
+            run_start = x
+        elif not is_blank and run_start is not None:
+            # Ignore page margins touching the edges
+            if x - run_start >= min_gutter and run_start > 0 and x < profile_width:
+                cuts.append((run_start + x) // 2)
+            run_start = None
+
+    scale = width / profile_width
+    edges = [0] + [int(cut * scale) for cut in cuts] + [width]
+    columns = [(left, right) for left, right in zip(edges, edges[1:]) if right - left > width * 0.1]
+
+    if not columns or len(columns) > max_columns:
+        return [(0, width)]
+    return columns
+
+def split_into_tiles(img, max_tiles=DEFAULT_MAX_TILES):
+    """Split image into overlapping bands per column, in reading order.
+
+    Returns a list of (column_index, box) tuples where box is a PIL crop box.
+    """
+    width, height = img.size
+    columns = detect_columns(img)
+
+    # Bands per column, shrinking the count if the tile budget would be exceeded
+    bands = max(1, math.ceil(height / TILE_MAX_HEIGHT))
+    while bands > 1 and bands * len(columns) > max_tiles:
+        bands -= 1
+    if bands * len(columns) > max_tiles:
+        columns = [(0, width)]
+        bands = min(max_tiles, max(1, math.ceil(height / TILE_MAX_HEIGHT)))
+
+    band_height = height / bands
+    overlap = int(band_height * TILE_OVERLAP_RATIO)
+
+    tiles = []
+    for column_index, (left, right) in enumerate(columns):
+        for band in range(bands):
+            top = max(0, int(band * band_height) - overlap)
+            bottom = min(height, int((band + 1) * band_height) + overlap)
+            tiles.append((column_index, (left, top, right, bottom)))
+    return tiles
+
+def _normalise_line(line):
+    return re.sub(r'[^\w$€£¥.,]+', ' ', line.lower()).strip()
+
+def stitch_tile_texts(tile_results):
+    """Join tile texts in reading order, dropping lines repeated across overlaps.
+
+    tile_results is a list of (column_index, text) in tile order.
+    """
+    stitched = []
+    previous_column = None
+    previous_tail = []
+
+    for column_index, text in tile_results:
+        lines = [line.rstrip() for line in (text or '').split('\n') if line.strip()]
+
+        if column_index == previous_column and previous_tail:
+            tail = set(previous_tail)
+            head = lines[:DEDUPE_WINDOW]
+            kept_head = [line for line in head if _normalise_line(line) not in tail]
+            lines = kept_head + lines[DEDUPE_WINDOW:]
+
+        stitched.extend(lines)
+        previous_column = column_index
+        previous_tail = [_normalise_line(line) for line in lines[-DEDUPE_WINDOW:]]
+
+    return "\n".join(stitched)
+
+async def tiled_menu_ocr(image_bytes, prompt, concurrency=None, max_tiles=None):
+    """OCR a menu image as concurrent tiles; wall-clock time tracks the slowest tile.
+
+    Raises if any tile fails, so callers fall back instead of caching a partial menu.
+    """
+    start_time = time.time()
+    concurrency = concurrency or int(os.getenv('OCR_TILE_CONCURRENCY', DEFAULT_TILE_CONCURRENCY))
+    max_tiles = max_tiles or int(os.getenv('OCR_MAX_TILES', DEFAULT_MAX_TILES))
+    output_format = os.getenv('OCR_IMAGE_FORMAT', 'JPEG')
+
+    def prepare_tiles():
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img = normalise_image(img, TILED_MAX_LONG_EDGE)
+            return [
+                (column_index, encode_image(img.crop(box), output_format))
+                for column_index, box in split_into_tiles(img, max_tiles)
+            ]
+
+    tiles = await asyncio.to_thread(prepare_tiles)
+    mime_type = get_output_mime_type(output_format)
+    print(f"🧩 Tiled OCR: {len(tiles)} tiles, concurrency {concurrency}")
+
+    client = get_pixtral_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ocr_tile(index, tile_bytes):
+        async with semaphore:
+            tile_start = time.time()
+            tile_base64 = base64.b64encode(tile_bytes).decode('utf-8')
+            text = await asyncio.wait_for(
+                client.vision_completion(prompt, tile_base64, mime_type=mime_type),
+                timeout=TILE_TIMEOUT
+            )
+            print(f"   ✅ Tile {index + 1}/{len(tiles)} in {time.time() - tile_start:.2f}s")
+            return text
+
+    results = await asyncio.gather(
+        *[ocr_tile(i, tile_bytes) for i, (_, tile_bytes) in enumerate(tiles)],
+        return_exceptions=True
+    )
+
+    tile_results = []
+    failed = 0
+    for (column_index, _), result in zip(tiles, results):
+        if isinstance(result, Exception):
+            print(f"   ❌ Tile failed: {type(result).__name__}: {str(result)}")
+            failed += 1
+            continue
+        tile_results.append((column_index, result))
+
+    if failed:
+        # Stitching the rest would silently drop whole columns and get cached as the full menu
+        raise RuntimeError(f"{failed}/{len(tiles)} OCR tiles failed")
+
+    text = stitch_tile_texts(tile_results)
+    print(f"✅ Tiled OCR: {len(tile_results)}/{len(tiles)} tiles, {len(text)} chars in {time.time() - start_time:.2f}s")
+    return text
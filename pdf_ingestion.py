@@ -0,0 +1,112 @@
+"""
+Multi-page PDF menu ingestion
+Pages are rasterised lazily, OCR'd concurrently under a bounded limit and
+streamed out as parsed dishes as soon as each page completes
+"""
+
+import io
+import os
+import asyncio
+import threading
+import time
+from utils import parse_menu_structure, categorize_dishes
+from ocr_service import process_menu_ocr, is_fallback_text
+
+DEFAULT_PAGE_CONCURRENCY = 2
+DEFAULT_RENDER_SCALE = 2.0  # 144 DPI, plenty for menu text
+MAX_PDF_PAGES = 30
+
+# pdfium is not thread-safe; serialise rendering across worker threads
+_render_lock = threading.Lock()
+
+def is_pdf(file_bytes):
+    """Detect PDFs by their magic header"""
+    return file_bytes[:5] == b'%PDF-'
+
+def open_pdf(pdf_bytes):
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise RuntimeError("PDF support requires pypdfium2 (pip install pypdfium2)")
+    return pdfium.PdfDocument(pdf_bytes)
+
+def close_pdf(document):
+    """Close a document once no worker thread is rendering from it.
+
+    Cancelling a page task does not stop its render thread; renders that
+    reach the lock after the close fail cleanly on the closed handle.
+    """
+    with _render_lock:
+        document.close()
+
+def render_pdf_page(document, page_index, scale=DEFAULT_RENDER_SCALE):
+    """Rasterise a single page to JPEG bytes, releasing the bitmap immediately"""
+    with _render_lock:
+        page = document[page_index]
+        try:
+            bitmap = page.render(scale=scale)
+            image = bitmap.to_pil().convert('RGB')
+        finally:
+            page.close()
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+async def stream_pdf_menu(pdf_bytes, ocr_func=process_menu_ocr, concurrency=None, transcript=None):
+    """Yield (page_index, dishes) for each PDF page as soon as it is OCR'd and parsed.
+
+    Pages are only rendered once a concurrency slot is free, so peak memory
+    stays proportional to the number of pages in flight rather than the document.
+    ocr_func is an async callable taking a file-like image. If transcript is
+    a dict it receives 'complete', False if any page failed or was skipped.
+    """
+    transcript = transcript if transcript is not None else {}
+    transcript['complete'] = False  # Until every page has been read
+    start_time = time.time()
+    concurrency = concurrency or int(os.getenv('PDF_PAGE_CONCURRENCY', DEFAULT_PAGE_CONCURRENCY))
+    document = open_pdf(pdf_bytes)
+
+    try:
+        page_count = min(len(document), MAX_PDF_PAGES)
+        failed_pages = len(document) - page_count
+        if len(document) > MAX_PDF_PAGES:
+            print(f"⚠️  PDF has {len(document)} pages, processing first {MAX_PDF_PAGES}")
+        print(f"📄 PDF menu: {page_count} pages, concurrency {concurrency}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def process_page(page_index):
+            async with semaphore:
+                page_jpeg = await asyncio.to_thread(render_pdf_page, document, page_index)
+                menu_text = await ocr_func(io.BytesIO(page_jpeg))
+
+            if is_fallback_text(menu_text):
+                print(f"   ❌ Page {page_index + 1}: OCR failed, skipping")
+                return page_index, None
+
+            dishes = categorize_dishes(parse_menu_structure(menu_text))
+            print(f"   ✅ Page {page_index + 1}: {len(dishes)} dishes after {time.time() - start_time:.2f}s")
+            return page_index, dishes
+
+        tasks = [asyncio.ensure_future(process_page(i)) for i in range(page_count)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                try:
+                    page_index, dishes = await next_page
+                except Exception as e:
+                    print(f"   ❌ PDF page failed: {type(e).__name__}: {str(e)}")
+                    failed_pages += 1
+                    continue
+                if dishes is None:
+                    failed_pages += 1
+                    dishes = []
+                yield page_index, dishes
+            transcript['complete'] = failed_pages == 0
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    finally:
+        await asyncio.to_thread(close_pdf, document)  # Waits for an in-flight render without blocking the loop
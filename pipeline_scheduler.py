@@ -0,0 +1,127 @@
+"""
+Per-dish dataflow scheduler for the menu pipeline
+Dishes flow through asyncio queues between stages instead of waiting at
+phase barriers, so a dish can get its image while later dishes are still
+being translated
+"""
+
+import asyncio
+import time
+
+_DONE = object()  # Sentinel telling a stage worker its input is exhausted
+
+class PipelineStage:
+    """A pipeline stage: an async handler applied to batches of dishes in place"""
+
+    def __init__(self, name, handler, concurrency=1, batch_size=1):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+async def _iterate_source(source):
+    if hasattr(source, '__aiter__'):
+        async for dish in source:
+            yield dish
+    else:
+        for dish in source:
+            yield dish
+
+async def run_dish_pipeline(source, stages, deadline=None, on_update=None):
+    """Run dishes from source (list or async iterable) through stages.
+
+    Each stage runs `concurrency` workers that pull up to `batch_size` ready
+    dishes at a time. Handler failures are logged and the dishes continue
+    downstream untouched. When `deadline` seconds elapse, in-flight work is
+    cancelled and dishes are returned as far as they got. `on_update(dish,
+    stage_name)` is called whenever a dish finishes a stage ("parsed" when
+    it first arrives).
+    """
+    start_time = time.time()
+    dishes = []
+    queues = [asyncio.Queue() for _ in stages]
+
+    def notify(batch, stage_name):
+        if on_update:
+            for dish in batch:
+                try:
+                    on_update(dish, stage_name)
+                except Exception as e:
+                    print(f"⚠️  Pipeline update callback failed: {str(e)}")
+
+    async def feed():
+        try:
+            async for dish in _iterate_source(source):
+                dishes.append(dish)
+                notify([dish], "parsed")
+                if queues:
+                    queues[0].put_nowait(dish)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Dish source failed after {len(dishes)} dishes: {type(e).__name__}: {str(e)}")
+        finally:
+            if queues:
+                for _ in range(stages[0].concurrency):
+                    queues[0].put_nowait(_DONE)
+
+    async def stage_worker(index, stage):
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+
+            # Micro-batch whatever else is already waiting, up to batch_size
+            batch = [item]
+            saw_done = False
+            while len(batch) < stage.batch_size and not inbox.empty():
+                extra = inbox.get_nowait()
+                if extra is _DONE:
+                    saw_done = True
+                    break
+                batch.append(extra)
+
+            try:
+                await stage.handler(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Stage {stage.name} failed for {len(batch)} dishes: {type(e).__name__}: {str(e)}")
+
+            notify(batch, stage.name)
+            if outbox:
+                for dish in batch:
+                    outbox.put_nowait(dish)
+
+            if saw_done:
+                return
+
+    async def run_stage(index, stage):
+        workers = [asyncio.ensure_future(stage_worker(index, stage)) for _ in range(stage.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            # Downstream workers exit once every upstream worker has finished
+            if index + 1 < len(stages):
+                for _ in range(stages[index + 1].concurrency):
+                    queues[index + 1].put_nowait(_DONE)
+
+    tasks = [asyncio.ensure_future(feed())]
+    tasks += [asyncio.ensure_future(run_stage(i, stage)) for i, stage in enumerate(stages)]
+
+    try:
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=deadline)
+    except asyncio.TimeoutError:
+        print(f"⏰ Pipeline deadline ({deadline}s) reached, returning {len(dishes)} dishes as they are")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"🏁 Pipeline processed {len(dishes)} dishes in {time.time() - start_time:.1f}s")
+    return dishes
@@ -6,25 +6,28 @@ in ocr_service.py, translation_service.py, and pixtral_service.py
 import os
 import asyncio
 import time
-from openai import AsyncOpenAI
+from http_pool import get_openai_client
+
+def pixtral_api_url(base_endpoint):
+    """OpenAI-compatible API root: PIXTRAL_ENDPOINT is the bare host, the routes live under /v1"""
+    base_url = base_endpoint.rstrip('/')
+    return base_url if base_url.endswith('/v1') else f"{base_url}/v1"
 
 class PixtralClient:
     def __init__(self):
         self.base_endpoint = os.getenv('PIXTRAL_ENDPOINT')
         self.api_key = os.getenv('OPENAI_API_KEY')
-        self.client = None
         
         if not self.base_endpoint or not self.api_key:
             raise ValueError("Missing PIXTRAL_ENDPOINT or OPENAI_API_KEY")
     
     def get_client(self):
-        if not self.client:
-            self.client = AsyncOpenAI(
-                api_key=self.api_key,
-                base_url=self.base_endpoint.rstrip('/'),
-                timeout=60.0  # Extended timeout for better reliability
-            )
-        return self.client
+        # Pooled per event loop, so the client survives across Streamlit actions
+        return get_openai_client(
+            pixtral_api_url(self.base_endpoint),
+            self.api_key,
+            timeout=60.0  # Extended timeout for better reliability
+        )
     
     async def text_completion(self, prompt, max_tokens=1000, temperature=0.3):
         """Simple text completion"""
@@ -39,7 +42,7 @@ class PixtralClient:
         
         return response.choices[0].message.content
     
-    async def vision_completion(self, prompt, image_base64, max_tokens=2000, temperature=0.1):
+    async def vision_completion(self, prompt, image_base64, max_tokens=2000, temperature=0.1, mime_type="image/jpeg"):
         """Vision completion with image"""
         client = self.get_client()
         
@@ -49,7 +52,7 @@ class PixtralClient:
                 "role": "user", 
                 "content": [
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}}
+                    {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_base64}"}}
                 ]
             }],
             max_tokens=max_tokens,
@@ -57,6 +60,31 @@ class PixtralClient:
         )
         
         return response.choices[0].message.content
+    
+    async def vision_completion_stream(self, prompt, image_base64, max_tokens=2000, temperature=0.1, mime_type="image/jpeg"):
+        """Vision completion streamed as text deltas (stream=True)"""
+        client = self.get_client()
+        
+        stream = await client.chat.completions.create(
+            model="mistralai/Pixtral-12B-2409",
+            messages=[{
+                "role": "user", 
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_base64}"}}
+                ]
+            }],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()  # Release the HTTP connection when the consumer stops early
 
 # Global client instance
 _pixtral_client = None
@@ -1,9 +1,15 @@
 import asyncio
 import os
+import re
+import json
 import base64
-from openai import AsyncOpenAI
+from http_pool import get_openai_client
 
-async def call_pixtral(prompt, image_base64=None, max_tokens=1000, temperature=0.3):
+ENHANCE_BATCH_TOKEN_BUDGET = 1500  # Approximate prompt tokens of dish text per batch
+ENHANCE_TOKENS_PER_DISH = 60  # Output budget per enhanced description
+ENHANCE_CONCURRENCY = 4
+
+async def call_pixtral(prompt, image_base64=None, max_tokens=1000, temperature=0.3, mime_type="image/jpeg", timeout=10.0):
     """General purpose Pixtral 12B API call via OpenAI SDK"""
     try:
         base_endpoint = os.getenv('PIXTRAL_ENDPOINT')
@@ -12,10 +18,7 @@ async def call_pixtral(prompt, image_base64=None, max_tokens=1000, temperature=0
         if not base_endpoint or not api_key:
             raise ValueError("Missing PIXTRAL_ENDPOINT or OPENAI_API_KEY environment variables")
         
-        client = AsyncOpenAI(
-            api_key=api_key,
-            base_url=base_endpoint.rstrip('/')
-        )
+        client = get_openai_client(base_endpoint.rstrip('/'), api_key)
         
         # Prepare message content
         if image_base64:
@@ -28,7 +31,7 @@ async def call_pixtral(prompt, image_base64=None, max_tokens=1000, temperature=0
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}"
+                        "url": f"data:{mime_type};base64,{image_base64}"
                     }
                 }
             ]
@@ -48,7 +51,7 @@ async def call_pixtral(prompt, image_base64=None, max_tokens=1000, temperature=0
                 max_tokens=max_tokens,
                 temperature=temperature
             ),
-            timeout=10.0
+            timeout=timeout
         )
         
         return response.choices[0].message.content
@@ -131,16 +134,129 @@ Please respond with ONLY the dish keys (e.g., "Appetizers_0, Main Courses_2, Des
                 fallback_selection.append(random.choice(category_dishes))
         return fallback_selection
 
-async def enhance_dish_descriptions(dishes):
-    """Use Pixtral 12B to enhance dish descriptions for better image generation"""
+async def enhance_dish_descriptions(dishes, batched=True):
+    """Use Pixtral 12B to enhance dish descriptions for better image generation
+
+    Batched mode packs many dishes into one JSON prompt per token-budgeted
+    chunk; dishes the model drops fall back to concurrent per-dish calls.
+    """
     try:
-        enhanced_dishes = []
+        semaphore = asyncio.Semaphore(ENHANCE_CONCURRENCY)
         
-        for dish in dishes:
-            name = dish.get('name_translated') or dish.get('name_original', '')
-            current_desc = dish.get('description_translated') or dish.get('description_original', '')
+        if batched:
+            chunks = chunk_dishes_by_token_budget(dishes, ENHANCE_BATCH_TOKEN_BUDGET)
+            
+            async def enhance_chunk(chunk):
+                async with semaphore:
+                    await enhance_description_batch(chunk)
+            
+            await asyncio.gather(*[enhance_chunk(chunk) for chunk in chunks])
+        
+        missing = [dish for dish in dishes if not dish.get('enhanced_description')]
+        if missing and batched:
+            print(f"🔄 Enhancing {len(missing)} dishes individually after batch")
+        
+        async def enhance_one(dish):
+            async with semaphore:
+                await enhance_single_description(dish)
+        
+        await asyncio.gather(*[enhance_one(dish) for dish in missing])
+        return dishes
+        
+    except Exception as e:
+        print(f"Description enhancement failed: {str(e)}")
+        return dishes
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+def dish_prompt_text(dish):
+    name = dish.get('name_translated') or dish.get('name_original', '')
+    desc = dish.get('description_translated') or dish.get('description_original', '')
+    return f"{name} {desc}"
+
+def chunk_dishes_by_token_budget(dishes, token_budget, text_of=dish_prompt_text):
+    """Split dishes into consecutive chunks whose text (per text_of) fits the token budget"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    
+    for dish in dishes:
+        tokens = estimate_tokens(text_of(dish)) + 10  # JSON overhead
+        
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        
+        current.append(dish)
+        current_tokens += tokens
+    
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def enhance_description_batch(dishes):
+    """Enhance a chunk of dishes with one structured JSON-in/JSON-out call"""
+    items = []
+    for i, dish in enumerate(dishes):
+        items.append({
+            "id": i,
+            "name": dish.get('name_translated') or dish.get('name_original', ''),
+            "description": dish.get('description_translated') or dish.get('description_original', '')
+        })
+    
+    batch_prompt = f"""For each dish below, create a brief, vivid description (20-30 words) suitable for AI image generation, capturing key visual elements, cooking method, main ingredients and presentation style.
+
+Dishes (JSON):
+{json.dumps(items, ensure_ascii=False)}
+
+Respond with ONLY a JSON array of objects with "id" and "enhanced_description", one per dish, e.g.
+[{{"id": 0, "enhanced_description": "..."}}]"""
+    
+    try:
+        response = await call_pixtral(
+            batch_prompt,
+            max_tokens=ENHANCE_TOKENS_PER_DISH * len(dishes) + 50,
+            temperature=0.4,
+            timeout=20.0
+        )
+        
+        for item in parse_json_array(response):
+            try:
+                index = int(item.get('id'))
+                enhanced_desc = str(item.get('enhanced_description') or '').strip()
+            except (TypeError, ValueError, AttributeError):
+                continue
             
-            enhancement_prompt = f"""Given this dish name and description, create a brief, vivid description suitable for AI image generation:
+            if 0 <= index < len(dishes) and enhanced_desc:
+                dishes[index]['enhanced_description'] = enhanced_desc
+                
+    except Exception as e:
+        print(f"Batch enhancement failed for {len(dishes)} dishes: {str(e)}")
+
+def parse_json_array(text):
+    """Extract the first JSON array from a model response, tolerating code fences and chatter"""
+    if not text:
+        return []
+    
+    match = re.search(r'\[.*\]', text, re.DOTALL)
+    if not match:
+        return []
+    
+    try:
+        result = json.loads(match.group(0))
+        return result if isinstance(result, list) else []
+    except json.JSONDecodeError:
+        return []
+
+async def enhance_single_description(dish):
+    """Enhance one dish description, falling back to the current description"""
+    name = dish.get('name_translated') or dish.get('name_original', '')
+    current_desc = dish.get('description_translated') or dish.get('description_original', '')
+    
+    enhancement_prompt = f"""Given this dish name and description, create a brief, vivid description suitable for AI image generation:
 
 Dish: {name}
 Current description: {current_desc}
@@ -152,21 +268,13 @@ Please provide a concise description (20-30 words) that captures:
 - Presentation style
 
 Enhanced description:"""
-            
-            try:
-                enhanced_desc = await call_pixtral(enhancement_prompt, max_tokens=100, temperature=0.4)
-                if enhanced_desc and enhanced_desc.strip():
-                    dish['enhanced_description'] = enhanced_desc.strip()
-                else:
-                    dish['enhanced_description'] = current_desc
-            except Exception as e:
-                print(f"Failed to enhance description for {name}: {str(e)}")
-                dish['enhanced_description'] = current_desc
-            
-            enhanced_dishes.append(dish)
-        
-        return enhanced_dishes
-        
+    
+    try:
+        enhanced_desc = await call_pixtral(enhancement_prompt, max_tokens=100, temperature=0.4)
+        if enhanced_desc and enhanced_desc.strip():
+            dish['enhanced_description'] = enhanced_desc.strip()
+        else:
+            dish['enhanced_description'] = current_desc
     except Exception as e:
-        print(f"Description enhancement failed: {str(e)}")
-        return dishes
\ No newline at end of file
+        print(f"Failed to enhance description for {name}: {str(e)}")
+        dish['enhanced_description'] = current_desc
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-row vs bulk inserts into processed_dishes
+Point DATABASE_URL at a local Postgres (tables are created if missing and
+benchmark rows are rolled back)
+Run with: python benchmark_dish_inserts.py [dishes_per_menu] [rounds]
+"""
+
+import os
+import sys
+import time
+import statistics
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import init_db, processed_dish_rows, insert_processed_dishes, PROCESSED_DISH_COLUMNS
+
+load_dotenv()
+
+def make_dishes(count):
+    """Synthetic menu with realistic field sizes"""
+    return [
+        {
+            'name_original': f"Dish {i}",
+            'name_translated': f"Plat {i}",
+            'description_original': "Slow-cooked with seasonal vegetables and house sauce",
+            'description_translated': "Mijoté avec des légumes de saison et sauce maison",
+            'price': f"${10 + i % 20}.95",
+            'category': "Main Courses",
+            'generated_image_url': f"imgref:{i:064x}"
+        }
+        for i in range(count)
+    ]
+
+def insert_per_row(cur, upload_id, dishes):
+    """The previous write path: one INSERT statement per dish"""
+    for row in processed_dish_rows(upload_id, dishes):
+        cur.execute(
+            f"INSERT INTO processed_dishes ({', '.join(PROCESSED_DISH_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(PROCESSED_DISH_COLUMNS))})",
+            row
+        )
+
+def time_strategy(conn, insert_func, dishes, rounds):
+    timings = []
+    for _ in range(rounds):
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO menu_uploads (original_image_url, selected_language)
+                VALUES ('benchmark', 'en') RETURNING id
+            """)
+            upload_id = cur.fetchone()['id']
+
+            start = time.perf_counter()
+            insert_func(cur, upload_id, dishes)
+            cur.execute("UPDATE menu_uploads SET processing_status = 'completed' WHERE id = %s", (upload_id,))
+            timings.append((time.perf_counter() - start) * 1000)
+        conn.rollback()
+    return timings
+
+def main():
+    dish_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    if not os.getenv('DATABASE_URL'):
+        print("❌ Missing DATABASE_URL in .env")
+        return
+
+    if not init_db():
+        print("❌ Could not initialise tables")
+        return
+
+    conn = psycopg2.connect(os.getenv('DATABASE_URL'), cursor_factory=RealDictCursor)
+    dishes = make_dishes(dish_count)
+    print(f"🏁 {dish_count} dishes per menu, {rounds} rounds")
+
+    try:
+        for name, insert_func in [("per-row", insert_per_row), ("bulk", insert_processed_dishes)]:
+            time_strategy(conn, insert_func, dishes, 2)  # Warm up
+            timings = time_strategy(conn, insert_func, dishes, rounds)
+            print(f"   {name:8s} median {statistics.median(timings):7.2f}ms   "
+                  f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f}ms")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
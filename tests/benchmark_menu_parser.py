@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled menu parser against the previous per-line regex version
+Parses a synthetic menu and checks both versions agree on dollar-priced lines,
+including lines where a currency word is a quantity ("2 pounds") or a number
+precedes the price ("Combo #2 $9.99")
+Run with: python benchmark_menu_parser.py [lines] [rounds]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils import is_category_header, parse_dish_line, categorize_dishes
+
+# Previous implementation, kept verbatim for comparison
+
+def legacy_is_category_header(line):
+    line = line.strip().upper()
+    category_keywords = [
+        'APPETIZER', 'APPETIZERS', 'STARTER', 'STARTERS',
+        'MAIN', 'MAINS', 'ENTREE', 'ENTREES', 'MAIN COURSE', 'MAIN COURSES',
+        'DESSERT', 'DESSERTS', 'SWEET', 'SWEETS',
+        'DRINK', 'DRINKS', 'BEVERAGE', 'BEVERAGES',
+        'SOUP', 'SOUPS', 'SALAD', 'SALADS',
+        'PASTA', 'PIZZA', 'SEAFOOD', 'MEAT', 'VEGETARIAN'
+    ]
+    has_keyword = any(keyword in line for keyword in category_keywords)
+    has_price = bool(re.search(r'\$\d+', line))
+    return has_keyword and not has_price and len(line.split()) <= 3
+
+def legacy_parse_dish_line(line, category):
+    price_patterns = [
+        r'\$(\d+\.?\d*)',
+        r'(\d+\.?\d*)\s*USD',
+        r'(\d+\.?\d*)\s*dollars?',
+    ]
+    price = None
+    price_match = None
+    for pattern in price_patterns:
+        match = re.search(pattern, line)
+        if match:
+            price = f"${match.group(1)}"
+            price_match = match
+            break
+    if not price_match:
+        return None
+    before_price = line[:price_match.start()].strip()
+    parts = before_price.split(' - ')
+    if len(parts) >= 2:
+        name = parts[0].strip()
+        description = ' - '.join(parts[1:]).strip()
+    else:
+        words = before_price.split()
+        if len(words) > 3:
+            name = ' '.join(words[:3])
+            description = ' '.join(words[3:])
+        else:
+            name = before_price
+            description = ""
+    return {'name_original': name, 'description_original': description, 'price': price, 'category': category}
+
+def legacy_categorize_dishes(dishes):
+    category_keywords = {
+        'Appetizers': ['salad', 'soup', 'appetizer', 'starter', 'bruschetta', 'wings'],
+        'Main Courses': ['salmon', 'steak', 'pasta', 'chicken', 'beef', 'pork', 'main', 'entree'],
+        'Desserts': ['cake', 'ice cream', 'chocolate', 'dessert', 'pie', 'cookie', 'sweet'],
+        'Beverages': ['coffee', 'tea', 'juice', 'soda', 'water', 'wine', 'beer', 'cocktail']
+    }
+    for dish in dishes:
+        text = f"{dish.get('name_original', '').lower()} {dish.get('description_original', '').lower()}"
+        best_category = dish.get('category', 'Other')
+        max_matches = 0
+        for category, keywords in category_keywords.items():
+            matches = sum(1 for keyword in keywords if keyword in text)
+            if matches > max_matches:
+                max_matches = matches
+                best_category = category
+        dish['category'] = best_category
+    return dishes
+
+def parse_lines(lines, header_func, dish_func, categorize_func):
+    category = "Other"
+    dishes = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if header_func(line):
+            category = line.title()
+            continue
+        dish = dish_func(line, category)
+        if dish:
+            dishes.append(dish)
+    return categorize_func(dishes)
+
+# Quantities and numbers that look like prices; the dollar price must win
+QUANTITY_LINES = [
+    "1/2 Pound Burger - with fries $12.95",
+    "Lobster 2 pounds - steamed $45",
+    "Pasta 2 euros extra $14",
+    "Mixed Grill 1 pound of meat 30 USD",
+    "Combo #2 - burger and fries $9.99",
+    "Oysters x6 $18"
+]
+
+def make_menu(line_count, seed=7):
+    """Synthetic OCR text: headers, dollar prices, quantity lines and a few lines without prices"""
+    rng = random.Random(seed)
+    headers = ["APPETIZERS", "MAIN COURSES", "DESSERTS", "DRINKS", "Soups", "Chef Specials"]
+    names = ["Grilled Salmon", "Caesar Salad", "Beef Wellington", "Chocolate Lava Cake", "Iced Tea",
+             "Chicken Tikka", "Mushroom Risotto", "French Onion Soup", "Apple Pie", "Craft Beer"]
+    details = ["with seasonal vegetables", "served with house sauce", "slow cooked for six hours",
+               "topped with fresh herbs and lemon", ""]
+    lines = []
+    for i in range(line_count):
+        roll = rng.random()
+        if roll < 0.05:
+            lines.append(rng.choice(headers))
+        elif roll < 0.12:
+            lines.append("Ask your server about today's specials")
+        elif roll < 0.15:
+            lines.append(rng.choice(QUANTITY_LINES))
+        else:
+            name = rng.choice(names)
+            detail = rng.choice(details)
+            price = f"{rng.randint(4, 60)}.{rng.choice(['00', '50', '95'])}"
+            style = rng.random()
+            if style < 0.7:
+                lines.append(f"{name} - {detail} ${price}" if detail else f"{name} ${price}")
+            elif style < 0.85:
+                lines.append(f"{name} {detail} {price} USD")
+            else:
+                lines.append(f"{name} {detail} {price} dollars")
+    return lines
+
+def best_time(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    lines = make_menu(line_count)
+
+    legacy = parse_lines(lines, legacy_is_category_header, legacy_parse_dish_line, legacy_categorize_dishes)
+    current = parse_lines(lines, is_category_header, parse_dish_line, categorize_dishes)
+    if legacy != current:
+        mismatches = sum(1 for a, b in zip(legacy, current) if a != b) + abs(len(legacy) - len(current))
+        print(f"❌ Parsers disagree on {mismatches} dishes")
+    else:
+        print(f"✅ Parsers agree on all {len(current)} dishes")
+
+    legacy_time = best_time(lambda: parse_lines(lines, legacy_is_category_header, legacy_parse_dish_line, legacy_categorize_dishes), rounds)
+    current_time = best_time(lambda: parse_lines(lines, is_category_header, parse_dish_line, categorize_dishes), rounds)
+
+    print(f"🏁 {line_count} lines, best of {rounds}")
+    print(f"   legacy   {legacy_time * 1000:8.1f}ms  {line_count / legacy_time:10.0f} lines/s")
+    print(f"   compiled {current_time * 1000:8.1f}ms  {line_count / current_time:10.0f} lines/s")
+    print(f"   speedup  {legacy_time / current_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Unit tests for the adaptive FLUX limiter, request hedging and payload negotiation
+FLUX is stubbed, so these run offline and deterministically
+Run with: python -m pytest tests/test_concurrency.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import image_generation
+from adaptive_concurrency import AdaptiveSemaphore, LatencyTracker, HedgeBudget
+
+@pytest.fixture
+def flux(monkeypatch):
+    """Configured FLUX endpoint with fresh negotiated capabilities and latency history"""
+    monkeypatch.setenv('FLUX_ENDPOINT', 'http://flux.test/predict')
+    monkeypatch.setenv('KOYEB_API_KEY', 'test-key')
+    monkeypatch.setattr(image_generation, 'flux_capabilities', {})
+    monkeypatch.setattr(image_generation, 'flux_latencies', LatencyTracker(min_samples=1))
+    return image_generation
+
+# Limiter
+
+def test_flat_latency_grows_limit_by_one_per_round_trip():
+    limiter = AdaptiveSemaphore(initial_limit=4)
+    for _ in range(4):
+        limiter.record_success(1.0)
+    assert 4.9 < limiter.limit < 5.0
+
+def test_limit_never_exceeds_max():
+    limiter = AdaptiveSemaphore(initial_limit=4, max_limit=5)
+    for _ in range(100):
+        limiter.record_success(1.0)
+    assert limiter.limit == 5
+
+def test_slow_completions_of_one_round_trip_cut_once():
+    limiter = AdaptiveSemaphore(initial_limit=10)
+    limiter.record_success(1.0)
+    start = limiter.limit
+    for _ in range(5):
+        limiter.record_success(5.0)
+    assert limiter.limit == pytest.approx(start * 0.8)
+
+def test_overload_cuts_again_after_a_round_trip():
+    limiter = AdaptiveSemaphore(initial_limit=16)
+    limiter.record_success(1.0)
+    limiter.record_overload()
+    limiter.record_overload()
+    assert int(limiter.limit) == 8
+
+    limiter.last_decrease -= limiter.baseline_latency  # One round trip later
+    limiter.record_overload()
+    assert int(limiter.limit) == 4
+
+def test_overload_never_goes_below_min_limit():
+    limiter = AdaptiveSemaphore(initial_limit=2, min_limit=1)
+    for _ in range(10):
+        limiter.record_overload()
+        limiter.last_decrease = None
+    assert limiter.limit == 1
+
+def test_waiters_get_slots_in_arrival_order():
+    async def scenario():
+        limiter = AdaptiveSemaphore(initial_limit=1)
+        order = []
+
+        async def worker(name):
+            async with limiter.slot():
+                order.append(name)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[worker(name) for name in "abc"])
+        return order, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (list("abc"), 0)
+
+def test_try_acquire_does_not_jump_the_queue():
+    async def scenario():
+        limiter = AdaptiveSemaphore(initial_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not limiter.try_acquire()
+
+        limiter.release()
+        await waiter
+        assert limiter.in_flight == 1
+        limiter.release()
+        assert limiter.try_acquire()
+
+    asyncio.run(scenario())
+
+def test_growing_the_limit_wakes_waiters():
+    async def scenario():
+        limiter = AdaptiveSemaphore(initial_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        limiter.limit = 2.0
+        limiter.record_success(1.0)
+        await asyncio.wait_for(waiter, 1)
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 2
+
+def test_hedge_budget_is_capped_per_image():
+    assert image_generation.create_hedge_budget(2).remaining == 2
+    assert image_generation.create_hedge_budget(40).remaining == 8
+
+# Hedging
+
+def stub_flux_request(monkeypatch, latencies):
+    """flux_request returning f"img{n}" for the n-th call after latencies[n] seconds"""
+    calls = []
+
+    async def flux_request(prompt, resolution="512x512"):
+        index = len(calls)
+        calls.append({'cancelled': False})
+        try:
+            await asyncio.sleep(latencies[index])
+        except asyncio.CancelledError:
+            calls[index]['cancelled'] = True
+            raise
+        return f"img{index}"
+
+    monkeypatch.setattr(image_generation, 'flux_request', flux_request)
+    return calls
+
+def test_hedge_wins_and_cancels_the_straggler(flux, monkeypatch):
+    flux.flux_latencies.record(0.05)
+    calls = stub_flux_request(monkeypatch, [5.0, 0.01])
+    budget = HedgeBudget(1)
+
+    async def scenario():
+        result = await flux.flux_hedged_request("soup", budget)
+        await asyncio.sleep(0)  # Let the cancellation land
+        return result, flux.get_flux_limiter().in_flight
+
+    assert asyncio.run(scenario()) == ("img1", 0)
+    assert calls[0]['cancelled']
+    assert budget.remaining == 0
+
+def test_fast_primary_spends_no_hedge(flux, monkeypatch):
+    flux.flux_latencies.record(1.0)
+    calls = stub_flux_request(monkeypatch, [0.01])
+    budget = HedgeBudget(1)
+
+    assert asyncio.run(flux.flux_hedged_request("soup", budget)) == "img0"
+    assert len(calls) == 1
+    assert budget.remaining == 1
+
+def test_no_hedge_without_a_free_limiter_slot(flux, monkeypatch):
+    flux.flux_latencies.record(0.05)
+    monkeypatch.setenv('FLUX_INITIAL_CONCURRENCY', '1')
+    calls = stub_flux_request(monkeypatch, [0.2, 0.01])
+    budget = HedgeBudget(1)
+
+    result = asyncio.run(flux.flux_generate_adaptive("soup", time.time() + 10, budget))
+
+    assert result == "img0"
+    assert len(calls) == 1
+    assert budget.remaining == 1
+
+# Payload negotiation
+
+def stub_post(monkeypatch, respond):
+    """post_flux_payload answering with respond(call index, payload)"""
+    posted = []
+
+    async def post_flux_payload(endpoint, headers, payload, preferred_shape=None):
+        posted.append(payload)
+        await asyncio.sleep(0.01)
+        return respond(len(posted) - 1, payload)
+
+    monkeypatch.setattr(image_generation, 'post_flux_payload', post_flux_payload)
+    return posted
+
+def test_probe_remembers_the_first_accepted_format(flux, monkeypatch):
+    # Only the minimal {"prompt"} body is accepted
+    posted = stub_post(monkeypatch, lambda i, payload: ('ok', 'img', 'url') if len(payload) == 1
+                       else ('rejected', None, None))
+
+    assert asyncio.run(flux.flux_request("soup")) == "img"
+    assert len(posted) == 3
+    assert flux.flux_capabilities['http://flux.test/predict']['payload'] == 2
+
+    posted.clear()
+    assert asyncio.run(flux.flux_request("salad")) == "img"
+    assert posted == [{'prompt': 'salad'}]
+
+def test_waiter_on_the_probe_lock_does_not_deadlock(flux, monkeypatch):
+    # The probe succeeds, then the waiter's own request is rejected and drops the cache
+    stub_post(monkeypatch, lambda i, payload: ('ok', 'img', 'url') if i == 0 else ('rejected', None, None))
+    monkeypatch.setenv('FLUX_REPROBE_AFTER', '1')
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(flux.flux_request("a"), flux.flux_request("b")), 2)
+
+    assert asyncio.run(scenario()) == ['img', None]
+
+def test_single_rejection_keeps_the_negotiated_format(flux, monkeypatch):
+    flux.flux_capabilities['http://flux.test/predict'] = {'payload': 0, 'response': 'url', 'rejections': 0}
+    posted = stub_post(monkeypatch, lambda i, payload: ('rejected', None, None))
+
+    assert asyncio.run(flux.flux_request("soup")) is None
+    assert len(posted) == 1
+    assert flux.flux_capabilities['http://flux.test/predict']['rejections'] == 1
+
+def test_repeated_rejections_reprobe(flux, monkeypatch):
+    flux.flux_capabilities['http://flux.test/predict'] = {'payload': 0, 'response': 'url', 'rejections': 2}
+    posted = stub_post(monkeypatch, lambda i, payload: ('ok', 'img', 'url') if i == 2
+                       else ('rejected', None, None))
+
+    assert asyncio.run(flux.flux_request("soup")) == "img"
+    assert len(posted) == 3  # The rejected request, then formats 1 and 2 of the probe
+    assert flux.flux_capabilities['http://flux.test/predict']['payload'] == 1
+
+def test_auth_errors_keep_the_negotiated_format(flux, monkeypatch):
+    flux.flux_capabilities['http://flux.test/predict'] = {'payload': 1, 'response': 'url', 'rejections': 0}
+    stub_post(monkeypatch, lambda i, payload: ('error', None, None))
+
+    assert asyncio.run(flux.flux_request("soup")) is None
+    assert flux.flux_capabilities['http://flux.test/predict'] == {'payload': 1, 'response': 'url', 'rejections': 0}
@@ -0,0 +1,65 @@
+"""
+Unit tests for menu line parsing and price handling
+Run with: python -m pytest tests/test_menu_parser.py
+"""
+
+import os
+import sys
+from decimal import Decimal
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils import parse_dish_line, parse_menu_structure, IncrementalMenuParser, find_price, price_to_decimal
+
+@pytest.mark.parametrize("line, name, price", [
+    ("Grilled Salmon - Lemon butter sauce $24.95", "Grilled Salmon", "$24.95"),
+    ("Ribeye €32.50", "Ribeye", "€32.50"),
+    ("Fish and chips 12 pounds", "Fish and chips", "£12"),
+    ("Wagyu 100g 45 EUR", "Wagyu 100g", "€45"),
+    ("Crêpe 6€", "Crêpe", "€6"),
+    ("Combo #2 $9.99", "Combo #2", "$9.99"),
+])
+def test_dish_line_prices(line, name, price):
+    dish = parse_dish_line(line, "Mains")
+    assert dish['name_original'] == name
+    assert dish['price'] == price
+
+@pytest.mark.parametrize("line, price", [
+    # A currency word that is a quantity must not win over the real price
+    ("Lobster 2 pounds $45", "$45"),
+    ("Wings 2 pounds - $18.00", "$18.00"),
+    ("Brisket 1 pound 28 USD", "$28"),
+    # With only currency words, the rightmost one is the price
+    ("Prime rib 2 pounds 30 dollars", "$30"),
+    # A number just before a prefix-symbol price is not a suffix-symbol price
+    ("Combo #2 $9.99", "$9.99"),
+    ("Oysters x6 $18", "$18"),
+    ("Set menu for 2 €45", "€45"),
+    ("Sushi set 3 pieces 1200 yen", "¥1200"),
+])
+def test_quantities_are_not_read_as_prices(line, price):
+    assert parse_dish_line(line, "Mains")['price'] == price
+
+def test_lines_without_a_price_are_skipped():
+    assert parse_dish_line("Served with fries", "Mains") is None
+    assert find_price("Pasta 14.50") is None
+
+def test_incremental_parser_matches_whole_text_parse():
+    text = "STARTERS\nSoup $5\nLobster 2 pounds $45\nDESSERTS\nTiramisu $8\n"
+    parser = IncrementalMenuParser()
+    dishes = []
+    for i in range(0, len(text), 7):  # Token-sized chunks split lines arbitrarily
+        dishes.extend(parser.feed(text[i:i + 7]))
+    dishes.extend(parser.close())
+    assert dishes == parse_menu_structure(text)
+
+@pytest.mark.parametrize("price, amount", [
+    ("$12.95", Decimal("12.95")),
+    ("€32,50", Decimal("32.50")),
+    ("£1,200.00", Decimal("1200.00")),
+    ("¥1200", Decimal("1200")),
+    ("Market price", None),
+    (None, None),
+])
+def test_price_to_decimal(price, amount):
+    assert price_to_decimal(price) == amount
@@ -0,0 +1,142 @@
+"""
+Translation memory for dish names and descriptions
+Strings already translated on earlier menus are served from an in-process LRU
+backed by Postgres, so only unseen strings are sent to Pixtral
+"""
+
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 5000
+
+def normalize_source(text):
+    """Unicode-normalise, collapse whitespace and casefold a source string"""
+    text = unicodedata.normalize('NFC', text or '')
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+def source_hash(normalized):
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+class TranslationMemory:
+    """LRU of (normalised source, language) -> translation with a Postgres second tier"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, translation):
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, texts, language):
+        """Return {text: translation} for every text with a remembered translation"""
+        found = {}
+        missing = {}  # source hash -> normalised source
+        with self._lock:
+            for text in texts:
+                key = (normalize_source(text), language)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[text] = self._entries[key]
+                elif key[0]:
+                    missing[source_hash(key[0])] = key[0]
+
+        if missing:
+            from database import get_translation_memory_entries
+            rows = get_translation_memory_entries(list(missing), language)
+            with self._lock:
+                for row in rows:
+                    self._remember((missing[row['source_hash']], language), row['translated_text'])
+            remembered = {missing[row['source_hash']]: row['translated_text'] for row in rows}
+            for text in texts:
+                normalized = normalize_source(text)
+                if text not in found and normalized in remembered:
+                    found[text] = remembered[normalized]
+
+        return found
+
+    def store(self, translations, language):
+        """Remember {source text: translation} pairs in memory and Postgres"""
+        rows = {}
+        with self._lock:
+            for text, translation in translations.items():
+                normalized = normalize_source(text)
+                if not normalized or not translation:
+                    continue
+                self._remember((normalized, language), translation)
+                rows[source_hash(normalized)] = (normalized, translation)
+
+        if rows:
+            from database import store_translation_memory_entries
+            store_translation_memory_entries(
+                [(digest, language, normalized, translation) for digest, (normalized, translation) in rows.items()]
+            )
+
+# Global memory instance
+_translation_memory = None
+
+def get_translation_memory():
+    """Return the translation memory, or None when TRANSLATION_MEMORY is disabled"""
+    global _translation_memory
+    if os.getenv('TRANSLATION_MEMORY', 'true').lower() != 'true':
+        return None
+    if _translation_memory is None:
+        _translation_memory = TranslationMemory(int(os.getenv('TRANSLATION_MEMORY_SIZE', DEFAULT_MAX_ENTRIES)))
+    return _translation_memory
+
+def dish_source_strings(dish):
+    return [text for text in (dish.get('name_original'), dish.get('description_original')) if text]
+
+def apply_translation_memory(dishes, language):
+    """Fill translations for dishes whose every source string is remembered.
+
+    Returns the dishes that still need translating; failures count as misses.
+    """
+    try:
+        memory = get_translation_memory()
+        if memory is None or not dishes:
+            return list(dishes)
+
+        remembered = memory.lookup({text for dish in dishes for text in dish_source_strings(dish)}, language)
+        pending = []
+        for dish in dishes:
+            if all(text in remembered for text in dish_source_strings(dish)):
+                dish['name_translated'] = remembered.get(dish.get('name_original'), dish.get('name_original', ''))
+                dish['description_translated'] = remembered.get(dish.get('description_original'), dish.get('description_original', ''))
+            else:
+                pending.append(dish)
+
+        if len(pending) < len(dishes):
+            print(f"🧠 Translation memory: {len(dishes) - len(pending)}/{len(dishes)} dishes already translated")
+        return pending
+
+    except Exception as e:
+        print(f"⚠️  Translation memory lookup failed: {str(e)}")
+        return list(dishes)
+
+def remember_dish_translations(dishes, language):
+    """Write freshly translated dish strings back to the translation memory"""
+    try:
+        memory = get_translation_memory()
+        if memory is None:
+            return
+
+        translations = {}
+        for dish in dishes:
+            if dish.get('name_original') and dish.get('name_translated'):
+                translations[dish['name_original']] = dish['name_translated']
+            # An untouched description means the model skipped it, not that it translates to itself
+            description = dish.get('description_original')
+            if description and dish.get('description_translated') not in (None, '', description):
+                translations[description] = dish['description_translated']
+        memory.store(translations, language)
+
+    except Exception as e:
+        print(f"⚠️  Translation memory store failed: {str(e)}")
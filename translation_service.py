@@ -1,6 +1,9 @@
 import asyncio
 import os
-from openai import AsyncOpenAI
+import json
+from http_pool import get_openai_client
+from pixtral_service import estimate_tokens, chunk_dishes_by_token_budget, parse_json_array
+from translation_memory import apply_translation_memory, remember_dish_translations
 
 LANGUAGE_CODES = {
     "en": "English",
@@ -15,8 +18,18 @@ LANGUAGE_CODES = {
     "fr": "French"
 }
 
+TRANSLATION_CHUNK_TOKEN_BUDGET = 400  # Approximate source tokens per chunk
+TRANSLATION_OUTPUT_TOKEN_RATIO = 3
+TRANSLATION_CONCURRENCY = 4
+TRANSLATION_CHUNK_RETRIES = 1
+TRANSLATION_CHUNK_TIMEOUT = 15.0
+
 async def translate_dishes(dishes, target_language):
-    """Translate dish names and descriptions using Mistral LLM"""
+    """Translate dish names and descriptions using Mistral LLM
+
+    Dishes that could not be translated keep their original text and are
+    marked with 'translation_failed'.
+    """
     if target_language == "en":
         # If target is English, just copy original to translated fields
         for dish in dishes:
@@ -26,62 +39,100 @@ async def translate_dishes(dishes, target_language):
     
     target_lang_name = LANGUAGE_CODES.get(target_language, "English")
     
-    # Batch translate all dishes at once for efficiency
+    # Recurring dishes come from translation memory; only the rest go to Pixtral
+    pending = await asyncio.to_thread(apply_translation_memory, dishes, target_language)
+    if not pending:
+        return dishes
+    
+    translated = []
     try:
-        translation_result = await translate_menu_with_pixtral(dishes, target_lang_name)
-        
-        if translation_result:
-            # Parse the translation result and update dishes
-            return parse_translation_result(dishes, translation_result)
-        else:
-            # Fallback: use original text
-            for dish in dishes:
-                dish['name_translated'] = dish.get('name_original', '')
-                dish['description_translated'] = dish.get('description_original', '')
-            return dishes
-            
+        translated = await translate_menu_with_pixtral(pending, target_lang_name)
+        await asyncio.to_thread(remember_dish_translations, translated, target_language)
     except Exception as e:
         print(f"Translation failed: {str(e)}")
-        # Fallback: use original text
-        for dish in dishes:
+    
+    # Fallback: dishes no chunk managed to translate keep their original text
+    translated_ids = {id(dish) for dish in translated}
+    for dish in pending:
+        if id(dish) not in translated_ids:
             dish['name_translated'] = dish.get('name_original', '')
             dish['description_translated'] = dish.get('description_original', '')
-        return dishes
+            dish['translation_failed'] = True  # Callers must not cache or persist this as a finished menu
+    return dishes
+
+async def translate_dishes_multi(dishes, languages):
+    """Translate one parsed menu into several languages concurrently.
+
+    Each language works on its own copies of the dishes (images and enhanced
+    descriptions are shared); returns {language: dishes}.
+    """
+    async def translate_copy(language):
+        copies = []
+        for dish in dishes:
+            copy = dict(dish)
+            copy.pop('name_translated', None)
+            copy.pop('description_translated', None)
+            copy.pop('translation_failed', None)
+            copies.append(copy)
+        return language, await translate_dishes(copies, language)
+    
+    results = await asyncio.gather(*[translate_copy(language) for language in dict.fromkeys(languages)])
+    return dict(results)
+
+def original_dish_text(dish):
+    return f"{dish.get('name_original', '')} {dish.get('description_original', '')}"
 
 async def translate_menu_with_pixtral(dishes, target_language):
-    """Use Pixtral 12B to translate entire menu at once via OpenAI SDK"""
-    try:
-        base_endpoint = os.getenv('PIXTRAL_ENDPOINT')
-        api_key = os.getenv('OPENAI_API_KEY')
-        
-        if not base_endpoint or not api_key:
-            raise ValueError("Missing PIXTRAL_ENDPOINT or OPENAI_API_KEY")
-        
-        client = AsyncOpenAI(
-            api_key=api_key,
-            base_url=base_endpoint.rstrip('/')
-        )
-        
-        # Prepare menu text for translation
-        menu_items = []
-        for i, dish in enumerate(dishes):
-            name = dish.get('name_original', '')
-            desc = dish.get('description_original', '')
-            menu_items.append(f"{i+1}. {name} - {desc}")
-        
-        menu_text = "\n".join(menu_items)
-        
-        translation_prompt = f"""Translate the following restaurant menu items to {target_language}. 
-Maintain the same numbering and structure. For each item, translate both the dish name and description.
-Keep the format as: "Number. Dish Name - Description"
+    """Translate dishes with Pixtral 12B in token-budgeted JSON chunks, concurrently.
 
+    Chunks that fail or come back incomplete are retried individually.
+    Translations are written onto the dishes; the translated dishes are returned.
+    """
+    base_endpoint = os.getenv('PIXTRAL_ENDPOINT')
+    api_key = os.getenv('OPENAI_API_KEY')
+    
+    if not base_endpoint or not api_key:
+        raise ValueError("Missing PIXTRAL_ENDPOINT or OPENAI_API_KEY")
+    
+    client = get_openai_client(base_endpoint.rstrip('/'), api_key)
+    semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+    translated = []
+    
+    async def translate_with_retry(chunk):
+        remaining = chunk
+        for attempt in range(TRANSLATION_CHUNK_RETRIES + 1):
+            async with semaphore:
+                done = await translate_chunk(client, remaining, target_language)
+            translated.extend(done)
+            done_ids = {id(dish) for dish in done}
+            remaining = [dish for dish in remaining if id(dish) not in done_ids]
+            if not remaining:
+                return
+            print(f"🔄 Translation chunk attempt {attempt + 1}: {len(remaining)}/{len(chunk)} dishes missing")
+    
+    chunks = chunk_dishes_by_token_budget(dishes, TRANSLATION_CHUNK_TOKEN_BUDGET, text_of=original_dish_text)
+    await asyncio.gather(*[translate_with_retry(chunk) for chunk in chunks])
+    print(f"🌐 Translated {len(translated)}/{len(dishes)} dishes in {len(chunks)} chunks")
+    return translated
+
+async def translate_chunk(client, dishes, target_language):
+    """Translate one chunk with a strict JSON-in/JSON-out prompt; returns the dishes translated"""
+    items = [
+        {"id": i, "name": dish.get('name_original', ''), "description": dish.get('description_original', '')}
+        for i, dish in enumerate(dishes)
+    ]
+    
+    translation_prompt = f"""Translate the following restaurant menu items to {target_language}.
 Provide accurate, culturally appropriate translations that would appeal to native speakers.
 
-Menu items to translate:
-{menu_text}
+Menu items (JSON):
+{json.dumps(items, ensure_ascii=False)}
 
-Translated menu:"""
-        
+Respond with ONLY a JSON array with one object per item, keeping each "id", e.g.
+[{{"id": 0, "name": "...", "description": "..."}}]"""
+    
+    source_tokens = sum(estimate_tokens(original_dish_text(dish)) for dish in dishes)
+    try:
         response = await asyncio.wait_for(
             client.chat.completions.create(
                 model="mistralai/Pixtral-12B-2409",
@@ -91,58 +142,34 @@ Translated menu:"""
                         "content": translation_prompt
                     }
                 ],
-                max_tokens=2000,
+                # Non-Latin scripts need several times the source tokens
+                max_tokens=source_tokens * TRANSLATION_OUTPUT_TOKEN_RATIO + 20 * len(dishes),
                 temperature=0.3
             ),
-            timeout=10.0  # 10 seconds for translation
+            timeout=TRANSLATION_CHUNK_TIMEOUT
         )
-        
-        return response.choices[0].message.content
+        return apply_translation_json(dishes, response.choices[0].message.content)
                     
     except Exception as e:
-        print(f"Pixtral translation error: {str(e)}")
-        return None
+        print(f"Pixtral translation error for {len(dishes)} dishes: {type(e).__name__}: {str(e)}")
+        return []
 
-def parse_translation_result(original_dishes, translation_text):
-    """Parse Pixtral translation result and update dishes"""
-    if not translation_text:
-        return original_dishes
-    
-    translated_lines = [line.strip() for line in translation_text.split('\n') if line.strip()]
-    
-    for i, dish in enumerate(original_dishes):
-        # Try to find corresponding translated line
-        translated_line = None
+def apply_translation_json(dishes, response_text):
+    """Merge a JSON translation array into dishes by id; returns the dishes translated"""
+    translated = {}  # index -> dish, so repeated ids count once
+    for item in parse_json_array(response_text):
+        try:
+            index = int(item.get('id'))
+            name = str(item.get('name') or '').strip()
+        except (TypeError, ValueError, AttributeError):
+            continue
         
-        # Look for line starting with the item number
-        for line in translated_lines:
-            if line.startswith(f"{i+1}."):
-                translated_line = line
-                break
+        if not (0 <= index < len(dishes)) or not name:
+            continue
         
-        if translated_line:
-            # Parse the translated line
-            try:
-                # Remove number prefix
-                content = translated_line[translated_line.index('.') + 1:].strip()
-                
-                # Split on ' - ' to separate name and description
-                if ' - ' in content:
-                    name_part, desc_part = content.split(' - ', 1)
-                    dish['name_translated'] = name_part.strip()
-                    dish['description_translated'] = desc_part.strip()
-                else:
-                    dish['name_translated'] = content.strip()
-                    dish['description_translated'] = dish.get('description_original', '')
-                    
-            except Exception as e:
-                print(f"Failed to parse translation for dish {i+1}: {str(e)}")
-                dish['name_translated'] = dish.get('name_original', '')
-                dish['description_translated'] = dish.get('description_original', '')
-        else:
-            # No translation found, use original
-            dish['name_translated'] = dish.get('name_original', '')
-            dish['description_translated'] = dish.get('description_original', '')
+        dish = dishes[index]
+        dish['name_translated'] = name
+        dish['description_translated'] = str(item.get('description') or '').strip() or dish.get('description_original', '')
+        translated[index] = dish
     
-    return original_dishes
-
+    return list(translated.values())
@@ -1,83 +1,157 @@
 import re
 import json
+from decimal import Decimal, InvalidOperation
 
 def parse_menu_structure(menu_text):
     """Parse OCR text into structured dish data"""
-    dishes = []
-    
     if not menu_text:
-        return dishes
-    
-    # Split into lines and clean
-    lines = [line.strip() for line in menu_text.split('\n') if line.strip()]
-    
-    current_category = "Other"
-    
-    for line in lines:
-        # Check if line is a category header
-        if is_category_header(line):
-            current_category = line.strip().title()
-            continue
-        
-        # Try to parse dish from line
-        dish = parse_dish_line(line, current_category)
-        if dish:
-            dishes.append(dish)
+        return []
     
+    parser = IncrementalMenuParser()
+    dishes = parser.feed(menu_text)
+    dishes.extend(parser.close())
     return dishes
 
+class IncrementalMenuParser:
+    """Line-oriented parser that emits dishes as soon as each OCR line is complete"""
+    
+    def __init__(self):
+        self.buffer = ""
+        self.current_category = "Other"
+    
+    def feed(self, chunk):
+        """Consume a text chunk and return dishes from any lines it completed"""
+        self.buffer += chunk
+        *lines, self.buffer = self.buffer.split('\n')
+        return self._parse_lines(lines)
+    
+    def close(self):
+        """Flush the trailing partial line at end of stream"""
+        lines, self.buffer = [self.buffer], ""
+        return self._parse_lines(lines)
+    
+    def _parse_lines(self, lines):
+        dishes = []
+        
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            
+            # Check if line is a category header
+            if is_category_header(line):
+                self.current_category = line.strip().title()
+                continue
+            
+            # Try to parse dish from line
+            dish = parse_dish_line(line, self.current_category)
+            if dish:
+                dishes.append(dish)
+        
+        return dishes
+
+CATEGORY_HEADER_KEYWORDS = [
+    'APPETIZER', 'APPETIZERS', 'STARTER', 'STARTERS',
+    'MAIN', 'MAINS', 'ENTREE', 'ENTREES', 'MAIN COURSE', 'MAIN COURSES',
+    'DESSERT', 'DESSERTS', 'SWEET', 'SWEETS',
+    'DRINK', 'DRINKS', 'BEVERAGE', 'BEVERAGES',
+    'SOUP', 'SOUPS', 'SALAD', 'SALADS',
+    'PASTA', 'PIZZA', 'SEAFOOD', 'MEAT', 'VEGETARIAN'
+]
+
+DISH_CATEGORY_KEYWORDS = {
+    'Appetizers': ['salad', 'soup', 'appetizer', 'starter', 'bruschetta', 'wings'],
+    'Main Courses': ['salmon', 'steak', 'pasta', 'chicken', 'beef', 'pork', 'main', 'entree'],
+    'Desserts': ['cake', 'ice cream', 'chocolate', 'dessert', 'pie', 'cookie', 'sweet'],
+    'Beverages': ['coffee', 'tea', 'juice', 'soda', 'water', 'wine', 'beer', 'cocktail']
+}
+
+# All header keywords in one alternation, longest first
+HEADER_KEYWORD_RE = re.compile('|'.join(
+    re.escape(keyword) for keyword in sorted(CATEGORY_HEADER_KEYWORDS, key=len, reverse=True)
+))
+
+# Flattened (keyword, category index) pairs; C-level substring checks beat a regex alternation here
+DISH_CATEGORIES = list(DISH_CATEGORY_KEYWORDS)
+DISH_KEYWORD_INDEX = [
+    (keyword, index) for index, keywords in enumerate(DISH_CATEGORY_KEYWORDS.values()) for keyword in keywords
+]
+
+# Prices: symbol before or after the amount, or a currency code/word after it.
+# Amounts may use comma decimals or thousands separators ("12,50", "1,200").
+# Currency words ("2 pounds", "2 euros extra") are often quantities, so they
+# only count as a price when the line has no symbol or code price. A suffix
+# symbol followed by a number is that number's prefix ("Combo #2 $9.99").
+PRICE_RE = re.compile(r"""
+    (?P<prefix>[$€£¥])\s?(?P<amount>\d+(?:[.,]\d+)*)
+  | (?P<suffix_amount>\d+(?:[.,]\d+)*)\s?
+    (?: (?P<suffix>[$€£¥])(?!\s?\d)
+      | (?P<code>(?i:USD|EUR|GBP|JPY))\b
+      | (?P<word>(?i:dollars?|euros?|pounds?|yen))\b )
+""", re.VERBOSE)
+PRICE_START_RE = re.compile(r'[$€£¥\d]')  # Every price starts with one of these
+
+CURRENCY_SYMBOLS = {
+    'usd': '$', 'dollar': '$', 'dollars': '$',
+    'eur': '€', 'euro': '€', 'euros': '€',
+    'gbp': '£', 'pound': '£', 'pounds': '£',
+    'jpy': '¥', 'yen': '¥'
+}
+
+def find_price(line):
+    """Leftmost symbol or code price in line, else the rightmost currency-word price, or None.
+
+    Jumping between candidate start characters and only then trying the full
+    pattern is much cheaper than letting PRICE_RE.search try every position.
+    """
+    word_match = None
+    pos = 0
+    while True:
+        candidate = PRICE_START_RE.search(line, pos)
+        if candidate is None:
+            return word_match
+        match = PRICE_RE.match(line, candidate.start())
+        if match is None:
+            pos = candidate.end()
+        elif match.group('word'):
+            word_match = match
+            pos = match.end()
+        else:
+            return match
+
 def is_category_header(line):
     """Identify if line is a category header"""
     line = line.strip().upper()
     
-    category_keywords = [
-        'APPETIZER', 'APPETIZERS', 'STARTER', 'STARTERS',
-        'MAIN', 'MAINS', 'ENTREE', 'ENTREES', 'MAIN COURSE', 'MAIN COURSES',
-        'DESSERT', 'DESSERTS', 'SWEET', 'SWEETS',
-        'DRINK', 'DRINKS', 'BEVERAGE', 'BEVERAGES',
-        'SOUP', 'SOUPS', 'SALAD', 'SALADS',
-        'PASTA', 'PIZZA', 'SEAFOOD', 'MEAT', 'VEGETARIAN'
-    ]
-    
     # Check if line contains category keywords and no price
-    has_keyword = any(keyword in line for keyword in category_keywords)
-    has_price = bool(re.search(r'\$\d+', line))
-    
-    return has_keyword and not has_price and len(line.split()) <= 3
+    return (
+        len(line.split()) <= 3
+        and HEADER_KEYWORD_RE.search(line) is not None
+        and find_price(line) is None
+    )
+
+def format_price(match):
+    """Normalise a price match to "<symbol><amount>", e.g. "$12.95", "€12,50" """
+    if match.group('prefix'):
+        return f"{match.group('prefix')}{match.group('amount')}"
+    symbol = match.group('suffix') or CURRENCY_SYMBOLS[(match.group('code') or match.group('word')).lower()]
+    return f"{symbol}{match.group('suffix_amount')}"
 
 def parse_dish_line(line, category):
     """Parse individual dish line"""
-    # Price patterns
-    price_patterns = [
-        r'\$(\d+\.?\d*)',  # $12.95, $12
-        r'(\d+\.?\d*)\s*USD',  # 12.95 USD
-        r'(\d+\.?\d*)\s*dollars?',  # 12 dollars
-    ]
-    
-    price = None
-    price_match = None
-    
-    # Find price in line
-    for pattern in price_patterns:
-        match = re.search(pattern, line)
-        if match:
-            price = f"${match.group(1)}"
-            price_match = match
-            break
-    
+    price_match = find_price(line)
     if not price_match:
         return None  # Skip lines without prices
     
     # Split line at price to get name and description
-    price_start = price_match.start()
-    before_price = line[:price_start].strip()
+    before_price = line[:price_match.start()].strip()
     
     # Try to separate name and description
-    parts = before_price.split(' - ')
+    name, separator, description = before_price.partition(' - ')
     
-    if len(parts) >= 2:
-        name = parts[0].strip()
-        description = ' - '.join(parts[1:]).strip()
+    if separator:
+        name = name.strip()
+        description = description.strip()
     else:
         # Use first few words as name, rest as description
         words = before_price.split()
@@ -91,36 +165,24 @@ def parse_dish_line(line, category):
     return {
         'name_original': name,
         'description_original': description,
-        'price': price,
+        'price': format_price(price_match),
         'category': category
     }
 
 def categorize_dishes(dishes):
     """Improve dish categorization using content analysis"""
-    
-    category_keywords = {
-        'Appetizers': ['salad', 'soup', 'appetizer', 'starter', 'bruschetta', 'wings'],
-        'Main Courses': ['salmon', 'steak', 'pasta', 'chicken', 'beef', 'pork', 'main', 'entree'],
-        'Desserts': ['cake', 'ice cream', 'chocolate', 'dessert', 'pie', 'cookie', 'sweet'],
-        'Beverages': ['coffee', 'tea', 'juice', 'soda', 'water', 'wine', 'beer', 'cocktail']
-    }
-    
     for dish in dishes:
-        name = dish.get('name_original', '').lower()
-        description = dish.get('description_original', '').lower()
-        text = f"{name} {description}"
-        
-        # Try to match keywords to improve categorization
-        best_category = dish.get('category', 'Other')
-        max_matches = 0
+        text = f"{dish.get('name_original', '')} {dish.get('description_original', '')}".lower()
         
-        for category, keywords in category_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword in text)
-            if matches > max_matches:
-                max_matches = matches
-                best_category = category
+        # Count matching keywords per category in one flat pass
+        counts = [0] * len(DISH_CATEGORIES)
+        for keyword, index in DISH_KEYWORD_INDEX:
+            if keyword in text:
+                counts[index] += 1
         
-        dish['category'] = best_category
+        best = max(counts)
+        if best:
+            dish['category'] = DISH_CATEGORIES[counts.index(best)]  # First category wins ties
     
     return dishes
 
@@ -147,4 +209,17 @@ def select_omakase_dishes(dishes):
             selected = random.choice(category_dishes)
             selections.append(selected)
     
-    return selections
\ No newline at end of file
+    return selections
+
+def price_to_decimal(price):
+    """Convert a display price like "$12.95" to a Decimal for DECIMAL columns (None if unparseable)"""
+    if price is None:
+        return None
+    text = re.sub(r'(?<=\d)[,.](?=\d{3}\b)', '', str(price))  # Drop thousands separators
+    match = re.search(r'\d+(?:[.,]\d+)?', text)
+    if not match:
+        return None
+    try:
+        return Decimal(match.group(0).replace(',', '.'))
+    except InvalidOperation:
+        return None